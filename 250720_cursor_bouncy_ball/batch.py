@@ -0,0 +1,228 @@
+"""Run many independent headless worlds in parallel for parameter tuning.
+
+Worlds are spread over a ProcessPoolExecutor. Each worker attaches once to
+a shared-memory block that receives every world's results, so only the
+small WorldConfig is sent to a worker per world and nothing is pickled
+back.
+
+    python batch.py --seeds 100 --gravity 0.15,0.2,0.25 --hole-width 40,60 --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from dataclasses import asdict, dataclass
+from multiprocessing import shared_memory
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from bouncy_ball import INPUT_ACTIVATE, HeadlessSimulation
+
+# Columns of the shared results array
+RESULT_FIELDS = ("score", "game_over_ms", "balls_remaining", "frames", "done")
+
+
+@dataclass
+class WorldConfig:
+    seed: int = 0
+    gravity: float = 0.2
+    bounce_damping: float = 0.8
+    hole_width: int = 60
+    move_distance: int = 20
+    dt: float = 1000 / 60
+    max_frames: int = 60 * 60 * 5  # Five simulated minutes
+    velocity_jitter: float = 1.0  # Seeded random offset added to each ball's starting velocity
+    policy: str = "track"  # "track" follows the lowest falling ball, "idle" never moves the bumper
+    reaction_frames: int = 8  # Track: frames between seeing the balls and the bumper acting on it
+    aim_noise: float = 40.0  # Track: standard deviation in pixels of where the bumper is centered
+    miss_rate: float = 0.2  # Track: chance of not firing when a ball is close
+
+
+def make_world(config):
+    sim = HeadlessSimulation(dt=config.dt, seed=config.seed)
+    sim.gravity = config.gravity
+    sim.bounce_damping = config.bounce_damping
+    sim.hole_width = config.hole_width
+    sim.place_holes()
+    for bumper in sim.bumpers:
+        bumper.move_distance = config.move_distance
+    # The built-in layout is fixed, so the seed varies the starting velocities
+    rng = np.random.default_rng(config.seed)
+    for ball in sim.balls:
+        ball.velocity[:] += rng.uniform(-config.velocity_jitter, config.velocity_jitter, size=2)
+    return sim
+
+
+class TrackPolicy:
+    """An imperfect player that keeps the bumper under the lowest falling ball and fires when it is close.
+
+    It acts on what it saw reaction_frames ago. For each ball it goes after
+    it picks an aim error with standard deviation aim_noise, and with
+    probability miss_rate it lets that ball go entirely. Both are drawn from
+    the world's seed, so the physics parameters decide how often it loses a
+    ball.
+    """
+
+    def __init__(self, config):
+        self.rng = np.random.default_rng([config.seed, 1])  # Independent of the velocity jitter stream
+        self.aim_noise = config.aim_noise
+        self.miss_rate = config.miss_rate
+        self.pending = deque([(0, -1)] * config.reaction_frames)
+        self.target = None  # Slot of the ball being played and (aim offset, missed) for it
+        self.offset = 0.0
+        self.missed = False
+
+    def decide(self, sim):
+        bumper = sim.bumpers[0]
+        falling = [ball for ball in sim.balls if ball.velocity[1] > 0 and ball.y < bumper.original_y]
+        if not falling:
+            self.target = None
+            return 0, -1
+        target = max(falling, key=lambda ball: ball.y)
+        if target.index != self.target:
+            self.target = target.index
+            self.offset = self.rng.normal(0.0, self.aim_noise)
+            self.missed = self.rng.random() < self.miss_rate
+        if self.missed:
+            return 0, -1
+        bits = INPUT_ACTIVATE if bumper.original_y - (target.y + target.radius) < 30 else 0
+        return bits, max(0, int(target.x + self.offset))
+
+    def __call__(self, sim):
+        """Input for one frame."""
+        self.pending.append(self.decide(sim))
+        return self.pending.popleft()
+
+
+def idle_policy(sim):
+    return 0, -1
+
+
+def make_policy(config):
+    return TrackPolicy(config) if config.policy == "track" else idle_policy
+
+
+# Shared results block, attached once per worker process
+_results = None
+_block = None
+
+
+def _init_worker(results_name, results_shape):
+    global _results, _block
+    _block = shared_memory.SharedMemory(name=results_name)
+    _results = np.ndarray(results_shape, dtype=np.float64, buffer=_block.buf)
+
+
+def _run_world(index, config):
+    sim = make_world(config)
+    policy = make_policy(config)
+    result = _results[index]
+    while sim.frame < config.max_frames and not sim.game_over:
+        sim.advance(config.dt, *policy(sim))
+    result[:] = (sim.score,
+                 sim.game_over_start_time if sim.game_over else math.nan,
+                 len(sim.balls),
+                 sim.frame,
+                 1.0)
+    return index
+
+
+def run_batch(configs, workers=None):
+    """Run one world per config and return a list of result dicts in the same order."""
+    n = len(configs)
+    results_shape = (n, len(RESULT_FIELDS))
+    results_block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(results_shape)) * 8))
+    try:
+        results = np.ndarray(results_shape, dtype=np.float64, buffer=results_block.buf)
+        results[:] = 0.0
+        chunksize = max(1, n // (8 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(results_block.name, results_shape)) as pool:
+            for _ in pool.map(_run_world, range(n), configs, chunksize=chunksize):
+                pass
+        rows = results.copy()
+    finally:
+        results_block.close()
+        results_block.unlink()
+    return [dict(asdict(config), **dict(zip(RESULT_FIELDS, row.tolist()))) for config, row in zip(configs, rows)]
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",")]
+
+
+def _ints(text):
+    return [int(v) for v in text.split(",")]
+
+
+def summarize(results, keys=("gravity", "bounce_damping", "hole_width", "move_distance")):
+    """Aggregate results over seeds for every parameter combination."""
+    groups = {}
+    for r in results:
+        groups.setdefault(tuple(r[k] for k in keys), []).append(r)
+    summary = []
+    for params, rows in groups.items():
+        game_over = np.array([r["game_over_ms"] for r in rows])
+        ended = ~np.isnan(game_over)
+        summary.append(dict(zip(keys, params),
+                            worlds=len(rows),
+                            mean_score=float(np.mean([r["score"] for r in rows])),
+                            game_over_rate=float(ended.mean()),
+                            mean_game_over_s=float(game_over[ended].mean() / 1000) if ended.any() else math.nan,
+                            mean_balls_remaining=float(np.mean([r["balls_remaining"] for r in rows]))))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless worlds in parallel")
+    parser.add_argument("--seeds", type=int, default=10, help="Worlds (seeds) per parameter combination")
+    parser.add_argument("--gravity", type=_floats, default=[0.2])
+    parser.add_argument("--bounce-damping", type=_floats, default=[0.8])
+    parser.add_argument("--hole-width", type=_ints, default=[60])
+    parser.add_argument("--move-distance", type=_ints, default=[20])
+    parser.add_argument("--max-frames", type=int, default=WorldConfig.max_frames)
+    parser.add_argument("--dt", type=float, default=WorldConfig.dt)
+    parser.add_argument("--policy", choices=("track", "idle"), default="track")
+    parser.add_argument("--reaction-frames", type=int, default=WorldConfig.reaction_frames,
+                        help="Track policy: frames of delay before the bumper reacts")
+    parser.add_argument("--aim-noise", type=float, default=WorldConfig.aim_noise,
+                        help="Track policy: standard deviation of the bumper's aim in pixels")
+    parser.add_argument("--miss-rate", type=float, default=WorldConfig.miss_rate,
+                        help="Track policy: chance of not firing at a close ball")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", metavar="FILE", help="Save per-world results and the summary as JSON")
+    args = parser.parse_args(argv)
+
+    configs = [WorldConfig(seed, gravity, damping, hole_width, move_distance, args.dt, args.max_frames,
+                           policy=args.policy, reaction_frames=args.reaction_frames,
+                           aim_noise=args.aim_noise, miss_rate=args.miss_rate)
+               for gravity, damping, hole_width, move_distance in itertools.product(
+                   args.gravity, args.bounce_damping, args.hole_width, args.move_distance)
+               for seed in range(args.seeds)]
+    start = time.perf_counter()
+    results = run_batch(configs, args.workers)
+    elapsed = time.perf_counter() - start
+    frames = sum(r["frames"] for r in results)
+    print(f"{len(results)} worlds, {frames:.0f} frames in {elapsed:.1f}s "
+          f"({frames / max(elapsed, 1e-9):.0f} frames/s)")
+
+    summary = summarize(results)
+    print(f"{'gravity':>8} {'damping':>8} {'hole':>5} {'move':>5} {'score':>9} {'over%':>6} {'over s':>8} {'left':>5}")
+    for s in summary:
+        print(f"{s['gravity']:>8.3f} {s['bounce_damping']:>8.3f} {s['hole_width']:>5} {s['move_distance']:>5} "
+              f"{s['mean_score']:>9.1f} {s['game_over_rate'] * 100:>6.0f} {s['mean_game_over_s']:>8.1f} "
+              f"{s['mean_balls_remaining']:>5.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "summary": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
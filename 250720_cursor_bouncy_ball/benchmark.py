@@ -0,0 +1,215 @@
+"""Benchmarks for the physics and rendering hot paths.
+
+Each case builds a headless world with a given number of balls and points
+per ball, then times every stage separately over a number of frames against
+an offscreen Surface. No display is needed.
+
+    python benchmark.py --balls 8,100,1000,10000 --points 10,25,40 --output base.json
+    python benchmark.py --output new.json --compare base.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import time
+
+import numpy as np
+import pygame
+
+from bouncy_ball import HeadlessSimulation, VectorDotBall
+from broadphase import make_broadphase
+from lod import LevelOfDetail
+from scene import BALL_DTYPE
+
+STAGES = ("update_physics", "check_ball_collision", "draw_background", "draw_balls", "draw_grid", "draw_info")
+# Stages timed for reference but not part of a real frame: the narrow phase already runs
+# inside update_physics, and the grid is drawn once into the cached background
+NOT_IN_FRAME = ("check_ball_collision", "draw_grid")
+PERCENTILES = (50, 90, 99)
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def populate(sim, num_balls, num_points, rng):
+    """Replace the world's balls with num_balls random balls that fit above the game line."""
+    sim.physics.clear()
+    sim.balls.clear()
+    # Shrink balls as the count grows so they still fit on screen
+    area = sim.width * sim.game_line_y
+    radius = min(50.0, max(2.0, 0.5 * math.sqrt(area / (num_balls * math.pi))))
+    records = np.zeros(num_balls, BALL_DTYPE)
+    records["num_points"] = num_points
+    for record in records:
+        r = radius * rng.uniform(0.7, 1.0)
+        record["radius"] = r
+        record["x"] = rng.uniform(r, sim.width - r)
+        record["y"] = rng.uniform(r, sim.game_line_y - r)
+        record["color"] = rng.integers(100, 256, size=3)
+        record["vx"], record["vy"] = rng.uniform(-4, 4, size=2)
+    sim.load_balls(records)
+
+
+def summarize(samples):
+    samples = np.asarray(samples)
+    stats = {"mean": float(samples.mean()), "max": float(samples.max())}
+    for p in PERCENTILES:
+        stats[f"p{p}"] = float(np.percentile(samples, p))
+    return stats
+
+
+def time_narrow_phase(sim):
+    """Time check_ball_collision over this frame's candidate pairs, leaving the state untouched.
+
+    The pairs come from a separate broad phase of the same kind, so the
+    world's own keeps its counters and the sort order it warm-starts from.
+    """
+    engine = sim.physics
+    if len(sim.balls) < 2:
+        return 0.0, 0
+    slots = sim.balls.slots
+    broadphase = make_broadphase(sim.broadphase.name, margin=sim.broadphase.margin)
+    pairs = broadphase.find_pairs(slots, engine.pos[slots], engine.radius[slots]).tolist()
+    pos = engine.pos.copy()
+    vel = engine.vel.copy()
+    start = time.perf_counter()
+    for i, j in pairs:
+        sim.check_ball_collision(sim.balls[i], sim.balls[i].velocity, sim.balls[j], sim.balls[j].velocity)
+    elapsed = time.perf_counter() - start
+    engine.pos[:] = pos
+    engine.vel[:] = vel
+    return elapsed, len(pairs)
+
+
+def run_case(num_balls, num_points, frames, warmup, broadphase="grid", seed=0, point_budget=0):
+    sim = HeadlessSimulation(broadphase=broadphase, seed=seed)
+    sim.screen = pygame.Surface((sim.width, sim.height))
+    # Full detail by default, so cases measure the same work from run to run
+    sim.lod = LevelOfDetail(point_budget) if point_budget else None
+    populate(sim, num_balls, num_points, np.random.default_rng(seed))
+
+    samples = {stage: [] for stage in STAGES}
+    pair_counts = []
+    for frame in range(warmup + frames):
+        timings = {}
+
+        narrow, num_pairs = time_narrow_phase(sim)
+        timings["check_ball_collision"] = narrow
+
+        start = time.perf_counter()
+        sim.update_physics(sim.dt)
+        timings["update_physics"] = time.perf_counter() - start
+
+        sim.screen.fill(sim.bg_color)
+        start = time.perf_counter()
+        sim.draw_grid()
+        timings["draw_grid"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sim.draw_background()
+        timings["draw_background"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapshot = sim.capture()
+        sim.plan_detail(snapshot)
+        sim.draw_balls(snapshot)
+        timings["draw_balls"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sim.draw_info(snapshot)
+        timings["draw_info"] = time.perf_counter() - start
+
+        if frame >= warmup:
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds * 1000)
+            pair_counts.append(num_pairs)
+
+    results = []
+    for stage in STAGES:
+        result = {"balls": num_balls, "points": num_points, "stage": stage}
+        result.update(summarize(samples[stage]))
+        results.append(result)
+    total = np.sum([samples[stage] for stage in STAGES if stage not in NOT_IN_FRAME], axis=0)
+    result = {"balls": num_balls, "points": num_points, "stage": "frame_total"}
+    result.update(summarize(total))
+    result["over_budget"] = float(np.mean(total > FRAME_BUDGET_MS))
+    result["mean_pairs"] = float(np.mean(pair_counts))
+    results.append(result)
+    return results
+
+
+def print_results(results):
+    print(f"{'balls':>6} {'points':>6} {'stage':<22}" +
+          "".join(f"{'p' + str(p):>10}" for p in PERCENTILES) + f"{'max':>10}")
+    for r in results:
+        print(f"{r['balls']:>6} {r['points']:>6} {r['stage']:<22}" +
+              "".join(f"{r['p' + str(p)]:>10.3f}" for p in PERCENTILES) + f"{r['max']:>10.3f}")
+
+
+def compare(base, new):
+    """Print p50/p99 of two result sets side by side. Ratios below 1.0 are faster."""
+    key = lambda r: (r["balls"], r["points"], r["stage"])
+    base_by_key = {key(r): r for r in base["results"]}
+    print(f"{'balls':>6} {'points':>6} {'stage':<22}{'base p50':>10}{'new p50':>10}{'ratio':>8}"
+          f"{'base p99':>10}{'new p99':>10}{'ratio':>8}")
+    for r in new["results"]:
+        b = base_by_key.get(key(r))
+        if b is None:
+            continue
+        cols = ""
+        for p in ("p50", "p99"):
+            ratio = r[p] / b[p] if b[p] > 0 else float("nan")
+            cols += f"{b[p]:>10.3f}{r[p]:>10.3f}{ratio:>8.2f}"
+        print(f"{r['balls']:>6} {r['points']:>6} {r['stage']:<22}{cols}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the physics and rendering hot paths")
+    parser.add_argument("--balls", default="8,100,1000,10000",
+                        help="Comma separated ball counts to sweep")
+    parser.add_argument("--points", default="10,25,40",
+                        help="Comma separated points per ball (num_points) to sweep")
+    parser.add_argument("--frames", type=int, default=60, help="Timed frames per case")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed frames before each case")
+    parser.add_argument("--broadphase", choices=("grid", "sweep", "brute"), default="grid")
+    parser.add_argument("--depth-buckets", type=int, default=VectorDotBall.depth_buckets,
+                        help="Depth buckets for pre-rendered dot sprites (0 draws each dot as a circle)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--point-budget", type=int, default=0,
+                        help="Level-of-detail dot budget per frame (default 0: every ball draws all its dots)")
+    parser.add_argument("--output", metavar="FILE", help="Save results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a previously saved JSON run")
+    args = parser.parse_args(argv)
+    VectorDotBall.depth_buckets = args.depth_buckets
+
+    pygame.font.init()
+    results = []
+    for num_balls in (int(n) for n in args.balls.split(",")):
+        for num_points in (int(n) for n in args.points.split(",")):
+            results.extend(run_case(num_balls, num_points, args.frames, args.warmup, args.broadphase, args.seed,
+                                    args.point_budget))
+    print_results(results)
+
+    run = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "frames": args.frames,
+            "broadphase": args.broadphase,
+            "depth_buckets": args.depth_buckets,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        print()
+        compare(base, run)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,59 @@
-import pygame
+import time
+
+IMPORT_START = time.perf_counter()  # For --measure-startup
+
+import argparse
 import math
 import random
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import pygame
+
+from broadphase import make_broadphase
+from events import BALL, BUMPER, CollisionEvents
+from physics import PhysicsEngine
+from profiler import FrameProfiler
+from sprites import depth_bucket, dot_shade, get_atlas
+from textcache import TextCache
+from replay import Recorder, Replayer, SessionLog
+from scene import default_scene, load_scene
+from snapshot import FrameSnapshot
+from lod import LevelOfDetail
+from spheres import nested_sphere, precompute_spheres
+
+# Speeds, gravity and durations counted in frames are all per frame at 60 Hz.
+# Physics steps of any other length are scaled by dt / REFERENCE_FRAME_MS.
+REFERENCE_FRAME_MS = 1000 / 60
+
+# Per-frame input bitmask, shared by live play, headless runs and session replay
+INPUT_LEFT = 1  # Left arrow held
+INPUT_RIGHT = 2  # Right arrow held
+INPUT_ACTIVATE = 4  # Space pressed or left mouse button clicked
+INPUT_RESTART = 8  # 'y' typed at the restart prompt
+INPUT_QUIT = 16  # ESC, window closed, or any other key at the restart prompt
+HELD_INPUTS = INPUT_LEFT | INPUT_RIGHT  # Bits that stay set while a key is held, not one-shot
 
 class Bumper:
+    __slots__ = ("x", "y", "width", "height", "is_active", "activation_duration", "original_y",
+                 "move_distance", "window_width", "hits")
+
+    color = (255, 255, 0)  # Yellow
+    max_activation_duration = 5  # frames - much shorter for quick up/down movement
+
     def __init__(self, x: float, y: float, width: int, height: int):
         self.x = x
         self.y = y
         self.width = width
         self.height = height
-        self.color = (255, 255, 0)  # Yellow
         self.is_active = False
-        self.activation_duration = 0
-        self.max_activation_duration = 5  # frames - much shorter for quick up/down movement
+        self.activation_duration = 0.0
         self.original_y = y
         self.move_distance = 20  # How far up the bumper moves
         self.window_width = None  # Set by app after creation
+        self.hits = 0  # Balls bounced off the top since the app last reported them
     
     def set_window_width(self, width):
         self.window_width = width
@@ -33,164 +71,338 @@ class Bumper:
     
     def update(self, dt):
         if self.is_active:
-            self.activation_duration -= 1
+            self.activation_duration -= dt / REFERENCE_FRAME_MS
             if self.activation_duration <= 0:
                 self.is_active = False
     
-    def check_collision(self, ball, ball_velocity):
+    def current_y(self):
         if self.is_active:
-            current_y = self.original_y - self.move_distance
+            return self.original_y - self.move_distance
+        return self.original_y
+    
+    def rect(self):
+        """Current (x, y, width, height) of the bumper."""
+        return self.x, self.current_y(), self.width, self.height
+    
+    def bounce(self, x, vx, vy, mask):
+        """Apply the bounce force to the balls selected by mask. vx and vy are modified in place."""
+        self.hits += int(np.count_nonzero(mask))
+        if self.is_active:
+            vy[mask] = -16  # Stronger upward force
+            hit_x = (x[mask] - self.x) / self.width
+            vx[mask] += (hit_x - 0.5) * 8  # More horizontal variation
         else:
-            current_y = self.original_y
-            
+            # Normal bounce when not activated
+            vy[mask] = -np.abs(vy[mask]) * 0.8  # Always bounce up
+    
+    def check_collisions(self, x, y, vx, vy, radius, mask):
+        """Collide all balls selected by mask with the bumper.
+
+        x, y, vx and vy are modified in place. Returns the mask of balls that hit.
+        """
+        current_y = self.current_y()
         # Check if ball is within bumper bounds
-        if (ball.x + ball.radius > self.x and 
-            ball.x - ball.radius < self.x + self.width and
-            ball.y + ball.radius > current_y and 
-            ball.y - ball.radius < current_y + self.height):
-            
-            # Separate the ball from the bumper to prevent sticking
-            if ball.y + ball.radius > current_y and ball.y < current_y + self.height:
-                # Ball is hitting from above or below
-                if ball.y < current_y + self.height // 2:
-                    # Ball is above center, push it up
-                    ball.y = current_y - ball.radius
-                else:
-                    # Ball is below center, push it down
-                    ball.y = current_y + self.height + ball.radius
-            
-            # Apply bounce force
-            if self.is_active:
-                ball_velocity[1] = -16  # Stronger upward force
-                hit_x = (ball.x - self.x) / self.width
-                ball_velocity[0] += (hit_x - 0.5) * 8  # More horizontal variation
-            else:
-                # Normal bounce when not activated
-                ball_velocity[1] = -abs(ball_velocity[1]) * 0.8  # Always bounce up
-                
-            return True
-        return False
+        hit = (mask &
+               (x + radius > self.x) &
+               (x - radius < self.x + self.width) &
+               (y + radius > current_y) &
+               (y - radius < current_y + self.height))
+        if not hit.any():
+            return hit
+
+        # Separate the ball from the bumper to prevent sticking
+        # (ball is hitting from above or below)
+        separate = hit & (y < current_y + self.height)
+        above = y < current_y + self.height // 2
+        push_up = separate & above
+        push_down = separate & ~above
+        y[push_up] = current_y - radius[push_up]
+        y[push_down] = current_y + self.height + radius[push_down]
+
+        self.bounce(x, vx, vy, hit)
+        return hit
     
     def draw(self, screen):
-        if self.is_active:
-            current_y = self.original_y - self.move_distance
-        else:
-            current_y = self.original_y
+        current_y = self.current_y()
         # Draw as rounded rectangle with border radius
-        pygame.draw.rect(screen, self.color, (self.x, current_y, self.width, self.height), border_radius=8)
+        return pygame.draw.rect(screen, self.color, (self.x, current_y, self.width, self.height), border_radius=8)
 
 class VectorDotBall:
-    def __init__(self, x: float, y: float, radius: int, num_points: int = 40, color: tuple = (255, 255, 255)):
-        self.x: float = x
-        self.y: float = y
-        self.radius = radius
+    """A dot ball whose physical state lives in a slot of a PhysicsEngine.
+
+    The ball is a thin view: position, velocity, radius and rotation are read
+    from and written to the engine arrays. A ball created without an engine
+    gets a private single-slot one.
+    """
+
+    __slots__ = ("engine", "index", "num_points", "color", "lod_points", "points_3d")
+
+    # Depth buckets of the pre-rendered dot sprites; 0 draws every dot with pygame.draw.circle
+    depth_buckets = 16
+    # Perspective projection
+    fov = 2.5  # field of view
+    viewer_distance = 3.0
+
+    def __init__(self, x: float, y: float, radius: int, num_points: int = 40, color: tuple = (255, 255, 255),
+                 engine: PhysicsEngine = None, velocity=(0.0, 0.0)):
+        engine = engine if engine is not None else PhysicsEngine(capacity=1)
+        self._bind(engine, engine.add_ball(x, y, radius, velocity[0], velocity[1]), num_points, color)
+
+    @classmethod
+    def from_slot(cls, engine: PhysicsEngine, index: int, num_points: int = 40, color: tuple = (255, 255, 255)):
+        """A ball viewing a slot that is already filled in, e.g. by PhysicsEngine.add_balls."""
+        ball = cls.__new__(cls)
+        ball._bind(engine, index, num_points, color)
+        return ball
+
+    def _bind(self, engine, index, num_points, color):
+        self.engine = engine
+        self.index = index
         self.num_points = num_points
         self.color = color
-        self.angle_x = 0.0
-        self.angle_y = 0.0
-        self.rotation_speed_x = 0.0015
-        self.rotation_speed_y = 0.0025
-        self.points_3d = []
-        self.generate_points_on_sphere()
+        self.lod_points = None  # Dots to draw, set by the level-of-detail pass; None draws them all
+        self.points_3d = None  # Looked up on first draw, so simulations that never draw never build them
+
+    @property
+    def x(self) -> float:
+        return float(self.engine.pos[self.index, 0])
+
+    @x.setter
+    def x(self, value):
+        self.engine.pos[self.index, 0] = value
+
+    @property
+    def y(self) -> float:
+        return float(self.engine.pos[self.index, 1])
+
+    @y.setter
+    def y(self, value):
+        self.engine.pos[self.index, 1] = value
+
+    @property
+    def radius(self) -> float:
+        return float(self.engine.radius[self.index])
+
+    @radius.setter
+    def radius(self, value):
+        self.engine.radius[self.index] = value
+
+    @property
+    def velocity(self):
+        """Writable (2,) view of this ball's velocity in the engine."""
+        return self.engine.vel[self.index]
+
+    @property
+    def angle_x(self) -> float:
+        return float(self.engine.angle[self.index, 0])
+
+    @angle_x.setter
+    def angle_x(self, value):
+        self.engine.angle[self.index, 0] = value
+
+    @property
+    def angle_y(self) -> float:
+        return float(self.engine.angle[self.index, 1])
+
+    @angle_y.setter
+    def angle_y(self, value):
+        self.engine.angle[self.index, 1] = value
+
+    @property
+    def rotation_speed_x(self) -> float:
+        return float(self.engine.spin[self.index, 0])
+
+    @property
+    def rotation_speed_y(self) -> float:
+        return float(self.engine.spin[self.index, 1])
 
     def generate_points_on_sphere(self):
-        """Generate points evenly distributed on a sphere using spherical coordinates."""
-        self.points_3d = []
-        golden_angle = math.pi * (3 - math.sqrt(5))
-        for i in range(self.num_points):
-            theta = golden_angle * i
-            z = 1 - (2 * i) / (self.num_points - 1)
-            radius = math.sqrt(1 - z * z)
-            x = math.cos(theta) * radius
-            y = math.sin(theta) * radius
-            self.points_3d.append([x, y, z])
-
-    def rotate_point(self, point, angle_x, angle_y):
-        """Rotate a 3D point around X and Y axes."""
-        x, y, z = point
-        # Rotate around X axis
-        cos_x = math.cos(angle_x)
-        sin_x = math.sin(angle_x)
-        y2 = y * cos_x - z * sin_x
-        z2 = y * sin_x + z * cos_x
-        # Rotate around Y axis
-        cos_y = math.cos(angle_y)
-        sin_y = math.sin(angle_y)
-        x2 = x * cos_y + z2 * sin_y
-        z3 = -x * sin_y + z2 * cos_y
-        return [x2, y2, z3]
+        """Use the shared, read-only unit-sphere points for this ball's number of dots.
 
-    def update(self, dt):
-        """Update ball rotation angles."""
-        self.angle_x += self.rotation_speed_x * dt
-        self.angle_y += self.rotation_speed_y * dt
-
-    def project(self, point3d, screen_width, screen_height):
-        """Project a 3D point onto the 2D screen using perspective projection."""
-        # Simple perspective projection
-        fov = 2.5  # field of view
-        viewer_distance = 3.0
-        x, y, z = point3d
-        factor = fov * self.radius / (viewer_distance - z)
-        x_proj = int(self.x + x * factor)
-        y_proj = int(self.y + y * factor)
-        return x_proj, y_proj, z
+        They are in nested order, so any prefix of them also covers the sphere.
+        """
+        self.points_3d = nested_sphere(self.num_points)
+
+    def sphere_points(self):
+        """The dots to draw this frame: the first lod_points of the ball's points, or all of them."""
+        if self.points_3d is None:
+            self.generate_points_on_sphere()
+        return self.points_3d if self.lod_points is None else self.points_3d[:int(self.lod_points)]
+
+
+class BallViews:
+    """The live balls in order, held as arrays of engine slots, dot counts and colors.
+
+    Indexing or iterating gives VectorDotBall views, but each one is only
+    built the first time its row is looked at and then kept until the ball
+    is removed. Loading a scene therefore builds no per-ball objects, and
+    code that only needs the slots, like the physics pass, reads `slots`.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.slots = np.zeros(0, dtype=np.intp)
+        self.num_points = np.zeros(0, dtype=np.intp)
+        self.colors = np.zeros((0, 3), dtype=np.uint8)
+        self._views = {}  # Engine slot -> VectorDotBall, for the rows looked at so far
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, i):
+        slot = int(self.slots[i])
+        ball = self._views.get(slot)
+        if ball is None:
+            ball = self._views[slot] = VectorDotBall.from_slot(self.engine, slot, int(self.num_points[i]),
+                                                               tuple(self.colors[i].tolist()))
+        return ball
+
+    def __iter__(self):
+        views = self._views
+        for i, slot in enumerate(self.slots.tolist()):
+            ball = views.get(slot)
+            yield ball if ball is not None else self[i]
+
+    def add(self, slots, num_points, colors):
+        """Append rows for engine slots that are already filled in."""
+        self.slots = np.concatenate((self.slots, slots))
+        self.num_points = np.concatenate((self.num_points, num_points))
+        self.colors = np.concatenate((self.colors, colors))
+
+    def keep(self, mask):
+        """Drop the rows where mask is False."""
+        for slot in self.slots[~mask].tolist():
+            self._views.pop(slot, None)
+        self.slots = self.slots[mask]
+        self.num_points = self.num_points[mask]
+        self.colors = self.colors[mask]
+
+    def clear(self):
+        self.keep(np.zeros(len(self.slots), dtype=bool))
+
+
+def rects_area(rects):
+    """Total area of rects, counting overlaps twice."""
+    return sum(rect.width * rect.height for rect in rects)
+
+
+def merge_rects(previous, current):
+    """Pair each rect of the previous frame with the one at the same index this frame.
+
+    Things are drawn in the same order every frame, so the pair is usually
+    one moving ball's boxes from consecutive frames, which mostly overlap.
+    A pair is replaced by its union when that is no larger than the two
+    apart, which roughly halves the area pushed to the display. Runs in one
+    pass; rects without a partner are kept as they are.
+    """
+    merged = []
+    for old, new in zip(previous, current):
+        union = old.union(new)
+        if union.width * union.height <= old.width * old.height + new.width * new.height:
+            merged.append(union)
+        else:
+            merged.append(old)
+            merged.append(new)
+    n = min(len(previous), len(current))
+    merged.extend(previous[n:])
+    merged.extend(current[n:])
+    return merged
 
-    def draw(self, screen):
-        width, height = screen.get_size()
-        projected_points = []
-        for point in self.points_3d:
-            rotated = self.rotate_point(point, self.angle_x, self.angle_y)
-            x2d, y2d, z = self.project(rotated, width, height)
-            projected_points.append((x2d, y2d, z))
-        # Sort points by depth for proper overlap
-        projected_points.sort(key=lambda p: p[2], reverse=True)
-        # Draw points only (no lines)
-        for i, (x, y, z) in enumerate(projected_points):
-            # Depth shading: closer points are brighter and larger
-            brightness_factor = (z + 1) / 2  # z in [-1,1] -> [0,1]
-            r, g, b = self.color
-            brightness = int(180 + 75 * brightness_factor)
-            color = (min(255, int(r * brightness_factor)), 
-                    min(255, int(g * brightness_factor)), 
-                    min(255, int(b * brightness_factor)))
-            size = int(1 + 1.5 * (z + 1))  # Smaller dots
-            pygame.draw.circle(screen, color, (x, y), size)
 
 class BouncyBallApp:
-    def __init__(self, width=600, height=800):
-        pygame.init()
+    def __init__(self, width=600, height=800, broadphase="grid", headless=False, seed=None,
+                 physics_hz=60, render_fps=60, vsync=False, dirty_rects=False, scene=None,
+                 point_budget=20000):
+        if scene is not None:
+            width, height = scene.width, scene.height
+        # Balls, bumpers, holes and physics constants; see scene.py
+        self.scene = scene if scene is not None else default_scene(width, height)
         self.width = width
         self.height = height
-        self.screen = pygame.display.set_mode((width, height))
-        pygame.display.set_caption("Bouncy Vector Ball - Amiga Style (3D)")
-        pygame.mouse.set_visible(False)
+        self.headless = headless
+        # Seed every random source so a session can be reproduced from its log
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+        if headless:
+            # No window, fonts or event pump; HeadlessSimulation sets up what it needs
+            self.screen = None
+        else:
+            # Only the display (which brings the event queue); fonts are initialized on first use,
+            # and audio and joysticks are never used
+            pygame.display.init()
+            self.screen = self.open_window(vsync)
+            pygame.display.set_caption("Bouncy Vector Ball - Amiga Style (3D)")
+            pygame.mouse.set_visible(False)
         self.clock = pygame.time.Clock()
         self.running = True
+        # Fixed-step scheduling: physics always advances in steps of 1000 / physics_hz ms,
+        # while frames are drawn at render_fps (0 for uncapped) with interpolated positions
+        self.physics_hz = physics_hz
+        self.render_fps = render_fps
+        self.max_frame_ms = 250  # Longest frame time fed to the physics while visible
+        self.hidden_fps = 10  # Frame rate while the window is minimized; physics still catches up
+        self.accumulator = 0.0  # Milliseconds of wall time not yet simulated
+        self.pending_bits = 0  # One-shot input waiting for the next physics step
+        self.pending_mouse_x = -1
+        self.time_ms = 0  # Simulated time, advanced by the dt passed to update_physics
+        self.frame = 0  # Frames advanced so far
+        self.input_bits = 0  # INPUT_* bits for the current frame
+        self.recorder = None  # Optional replay.Recorder
+        self.events = deque(maxlen=1024)  # Recent game events as dicts, consumed by telemetry
+        self.profiler = FrameProfiler()  # Per-stage timings, overlay toggled with F3
         
         # Game elements (must be defined before bumpers)
-        self.game_line_y = self.height - 100  # Line moved up to 100 pixels from bottom
-        self.hole_width = 60  # Width of each hole (made smaller to fit two)
-        # Two holes: one on the left side and one on the right side
-        self.hole1_x = self.width // 4 - self.hole_width // 2  # Left hole
-        self.hole2_x = 3 * self.width // 4 - self.hole_width // 2  # Right hole
+        self.game_line_y = self.scene.game_line_y
+        self.hole_width = 60  # Width of each hole laid out by place_holes
+        self.hole_spans = tuple(tuple(hole) for hole in self.scene.holes)  # (x, width) per hole in the line
         
         # Colors
         self.bg_color = (0, 0, 0)
         self.grid_color = (20, 20, 20)
         self.line_color = (255, 255, 255)  # White line
         
+        # Cached static background (grid, game line and holes), see draw_background
+        self.background = None
+        self.background_layout = None
+        
+        # Dirty-rect rendering: restore and update only what changed since the last frame
+        self.dirty_rects = dirty_rects
+        self.drawn_rects = None  # Everything drawn over the background last frame; None forces a full redraw
+        self.max_dirty_fraction = 0.5  # Flip the whole display when more of the screen than this changed
+        
+        # What drawing reads: the game as of the last physics step, copied so that it can be drawn
+        # while the next steps run (see run_pipelined); the back snapshot is only used there
+        self.front_snapshot = FrameSnapshot()
+        self.back_snapshot = FrameSnapshot()
+        
+        # Dots drawn per ball, from its size, a per-frame dot budget and the frame time; None draws all
+        self.lod = LevelOfDetail(point_budget) if point_budget else None
+        
+        # Fonts and rendered HUD text, loaded and rendered on first use
+        self.text = TextCache()
+        # Setup left out of startup and the first frame, done one piece per frame afterwards; see warm_up
+        self.warming_up = None if headless else self.warm_up()
+        
         # Game state
         self.game_over = False
         self.game_over_start_time = 0
         self.game_over_duration = 5000  # 5 seconds in milliseconds
         self.asking_restart = False
         self.score = 0  # Track successful ball blocks
+        # A block is a ball reaching the line at least this fast (pixels per reference frame); slower
+        # contacts are a ball resting on it, which would otherwise score once per physics step
+        self.min_block_speed = 2.0
         
-        # Multiple balls
-        self.balls = []
-        self.ball_velocities = []
+        # Multiple balls, with their state held in the physics engine
+        self.physics = PhysicsEngine()
+        # Every contact of each physics step, for subscribers and per-second hit stats
+        self.collisions = CollisionEvents(self.width, self.height)
+        self.physics.events = self.collisions
+        self.balls = BallViews(self.physics)
         self.initialize_balls()
+        # Finds candidate pairs for the ball-ball collision pass ("grid", "sweep" or "brute")
+        self.broadphase = make_broadphase(broadphase)
         
         # Bumpers
         self.bumpers = []
@@ -200,65 +412,38 @@ class BouncyBallApp:
         for bumper in self.bumpers:
             bumper.set_window_width(self.width)
         
-        self.gravity = 0.2
-        self.bounce_damping = 0.8
-        self.bumper_move_speed = 5  # Pixels per frame for continuous movement
+        self.gravity = self.scene.gravity
+        self.bounce_damping = self.scene.bounce_damping
+        # Swept collision against walls, line and bumpers instead of only fixing overlaps afterwards
+        self.continuous_collisions = True
+        self.bumper_move_speed = self.scene.bumper_move_speed  # Pixels per frame for continuous movement
     
     def initialize_bumpers(self):
-        """Initialize the pinball bumper"""
-        bumper_width = 120  # Wider
-        bumper_height = 25  # Shorter
-        margin = 50
-        
-        # Center bumper positioned above the game line
-        center_bumper = Bumper((self.width - bumper_width) // 2, self.game_line_y - bumper_height - 20, 
-                              bumper_width, bumper_height)
-        self.bumpers.append(center_bumper)
+        """Create the scene's bumpers"""
+        for x, y, width, height in self.scene.bumpers:
+            self.bumpers.append(Bumper(x, y, width, height))
     
     def initialize_balls(self):
-        """Initialize multiple smaller balls with different positions and velocities"""
-        # Ball 1 (center)
-        ball1 = VectorDotBall(self.width // 2, self.height // 2, 50, 25, (255, 100, 100))
-        self.balls.append(ball1)
-        self.ball_velocities.append([3, 2])
-        
-        # Ball 2 (top left)
-        ball2 = VectorDotBall(self.width // 4, self.height // 4, 40, 20, (100, 255, 100))
-        self.balls.append(ball2)
-        self.ball_velocities.append([-2, 3])
-        
-        # Ball 3 (bottom right)
-        ball3 = VectorDotBall(3 * self.width // 4, 3 * self.height // 4, 45, 22, (100, 100, 255))
-        self.balls.append(ball3)
-        self.ball_velocities.append([4, -1])
-        
-        # Ball 4 (top right)
-        ball4 = VectorDotBall(3 * self.width // 4, self.height // 4, 35, 18, (255, 255, 100))
-        self.balls.append(ball4)
-        self.ball_velocities.append([-3, 1])
-        
-        # Ball 5 (bottom left)
-        ball5 = VectorDotBall(self.width // 4, 3 * self.height // 4, 42, 21, (255, 100, 255))
-        self.balls.append(ball5)
-        self.ball_velocities.append([2, -2])
-        
-        # Ball 6 (center top)
-        ball6 = VectorDotBall(self.width // 2, self.height // 3, 38, 19, (100, 255, 255))
-        self.balls.append(ball6)
-        self.ball_velocities.append([1, 4])
-        
-        # Ball 7 (center bottom)
-        ball7 = VectorDotBall(self.width // 2, 2 * self.height // 3, 47, 24, (255, 150, 100))
-        self.balls.append(ball7)
-        self.ball_velocities.append([-1, -3])
-        
-        # Ball 8 (random position)
-        ball8 = VectorDotBall(self.width // 3, self.height // 2, 33, 17, (150, 100, 255))
-        self.balls.append(ball8)
-        self.ball_velocities.append([3, -2])
+        """Create the scene's balls"""
+        self.load_balls(self.scene.balls)
+    
+    def load_balls(self, records):
+        """Add balls from an array of scene.BALL_DTYPE records.
+
+        Their state is copied into the physics arrays in one go, and their dot
+        counts and colors into self.balls, which only builds a ball's view
+        when it is first looked at.
+        """
+        pos = np.column_stack((records["x"], records["y"]))
+        vel = np.column_stack((records["vx"], records["vy"]))
+        slots = self.physics.add_balls(pos, vel, records["radius"])
+        self.balls.add(slots, records["num_points"], records["color"])
     
     def check_ball_collision(self, ball1, vel1, ball2, vel2):
-        """Check and handle collision between two balls"""
+        """Check and handle collision between two balls.
+        
+        Returns the impulse applied to each ball, or 0.0 if they did not collide.
+        """
         dx = ball2.x - ball1.x
         dy = ball2.y - ball1.y
         distance = math.sqrt(dx * dx + dy * dy)
@@ -300,7 +485,7 @@ class BouncyBallApp:
                 
                 # Don't resolve if balls are moving apart
                 if vel_along_normal > 0:
-                    return
+                    return 0.0
                 
                 # Restitution (bounciness)
                 restitution = 0.8
@@ -317,136 +502,172 @@ class BouncyBallApp:
                 vel1[1] -= impulse_y
                 vel2[0] += impulse_x
                 vel2[1] += impulse_y
+                return j
+        return 0.0
     
-    def check_ball_fell_through_hole(self, ball):
-        """Check if ball fell through either hole and should be removed"""
-        if ball.y + ball.radius > self.game_line_y:
-            # Ball is below the game line
-            # Check if ball is in either hole
-            in_hole1 = (ball.x >= self.hole1_x and ball.x <= self.hole1_x + self.hole_width)
-            in_hole2 = (ball.x >= self.hole2_x and ball.x <= self.hole2_x + self.hole_width)
-            
-            if in_hole1 or in_hole2:
-                # Ball is in one of the holes, only remove after it falls below the window
-                if ball.y - ball.radius > self.height:
-                    return True
-                else:
-                    return False
-            else:
-                # Ball is not in either hole, it should bounce off the line
-                ball.y = self.game_line_y - ball.radius
-                self.score += 1  # Increment score for successful block
-                return False
-        return False
+    def place_holes(self):
+        """Replace the holes with two centered in the left and right halves for the current hole_width."""
+        # Two holes: one on the left side and one on the right side
+        hole1_x = self.width // 4 - self.hole_width // 2  # Left hole
+        hole2_x = 3 * self.width // 4 - self.hole_width // 2  # Right hole
+        self.hole_spans = ((hole1_x, self.hole_width), (hole2_x, self.hole_width))
+    
+    def holes(self):
+        """The holes in the game line as (x, width) pairs."""
+        return self.hole_spans
     
     def handle_events(self):
+        """Translate pending pygame events and held keys into (input bits, mouse x)."""
+        bits = 0
+        mouse_x = -1
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                self.running = False
+                bits |= INPUT_QUIT
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    self.running = False
+                    bits |= INPUT_QUIT
+                elif event.key == pygame.K_F3:
+                    # Display only, so not part of the recorded input
+                    self.profiler.toggle_overlay()
                 elif self.asking_restart:
                     # Handle restart prompt
                     if event.unicode.lower() == 'y':
-                        self.reset_game()
+                        bits |= INPUT_RESTART
                     else:
-                        self.running = False
+                        bits |= INPUT_QUIT
                 elif event.key == pygame.K_SPACE:
-                    # Activate bumpers
-                    for bumper in self.bumpers:
-                        bumper.activate()
+                    bits |= INPUT_ACTIVATE
             elif event.type == pygame.MOUSEMOTION and not self.asking_restart:
                 mouse_x, _ = event.pos
-                for bumper in self.bumpers:
-                    bumper.set_x_center(mouse_x)
             elif event.type == pygame.MOUSEBUTTONDOWN and not self.asking_restart:
                 if event.button == 1:  # Left mouse button
-                    for bumper in self.bumpers:
-                        bumper.activate()
+                    bits |= INPUT_ACTIVATE
+        
+        # Continuous arrow key movement
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT]:
+            bits |= INPUT_LEFT
+        if keys[pygame.K_RIGHT]:
+            bits |= INPUT_RIGHT
+        return bits, mouse_x
+    
+    def apply_input(self, bits, mouse_x=-1):
+        """Act on one frame of input. Held arrow keys are read later by update_physics."""
+        self.input_bits = bits
+        if bits & INPUT_QUIT:
+            self.running = False
+        if bits & INPUT_RESTART:
+            self.reset_game()
+        if mouse_x >= 0:
+            for bumper in self.bumpers:
+                bumper.set_x_center(mouse_x)
+        if bits & INPUT_ACTIVATE:
+            # Activate bumpers
+            for bumper in self.bumpers:
+                bumper.activate()
+    
+    def advance(self, dt, bits=0, mouse_x=-1):
+        """Apply one frame of input, then step the game by dt milliseconds."""
+        self.apply_input(bits, mouse_x)
+        self.step(dt)
+        self.frame += 1
+        if self.recorder is not None:
+            self.recorder.record(self, dt, bits, mouse_x)
     
     def update_physics(self, dt):
+        self.time_ms += dt
+        step = dt / REFERENCE_FRAME_MS  # Length of this step in reference frames
+        collisions = self.collisions
+        collisions.reset(self.frame)
+        
         # Handle continuous arrow key movement
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
+        if self.input_bits & INPUT_LEFT:
             for bumper in self.bumpers:
-                new_x = max(0, bumper.x - self.bumper_move_speed)
+                new_x = max(0, bumper.x - self.bumper_move_speed * step)
                 bumper.x = new_x
-        if keys[pygame.K_RIGHT]:
+        if self.input_bits & INPUT_RIGHT:
             for bumper in self.bumpers:
-                new_x = min(self.width - bumper.width, bumper.x + self.bumper_move_speed)
+                new_x = min(self.width - bumper.width, bumper.x + self.bumper_move_speed * step)
                 bumper.x = new_x
         
         # Update bumpers
         for bumper in self.bumpers:
             bumper.update(dt)
         
-        # Update each ball's physics
-        balls_to_remove = []
-        for i, (ball, velocity) in enumerate(zip(self.balls, self.ball_velocities)):
-            # Apply gravity
-            velocity[1] += self.gravity
-            
-            # Update position
-            ball.x += velocity[0]
-            ball.y += velocity[1]
-            
-            # Check if ball fell through hole
-            if self.check_ball_fell_through_hole(ball):
-                balls_to_remove.append(i)
-                continue
-            
-            # Check bumper collisions
-            for bumper in self.bumpers:
-                if bumper.check_collision(ball, velocity):
-                    break  # Only one bumper collision per frame
-            
-            # Bounce off walls
-            if ball.x - ball.radius <= 0:
-                ball.x = ball.radius
-                velocity[0] = -velocity[0] * self.bounce_damping
-            elif ball.x + ball.radius >= self.width:
-                ball.x = self.width - ball.radius
-                velocity[0] = -velocity[0] * self.bounce_damping
-                
-            if ball.y - ball.radius <= 0:
-                ball.y = ball.radius
-                velocity[1] = -velocity[1] * self.bounce_damping
-            
-            # Bounce off game line (solid parts)
-            if ball.y + ball.radius >= self.game_line_y:
-                # Check if ball is hitting the solid parts of the line (not in either hole)
-                in_hole1 = (ball.x >= self.hole1_x and ball.x <= self.hole1_x + self.hole_width)
-                in_hole2 = (ball.x >= self.hole2_x and ball.x <= self.hole2_x + self.hole_width)
-                
-                if not in_hole1 and not in_hole2:
-                    ball.y = self.game_line_y - ball.radius
-                    velocity[1] = -velocity[1] * self.bounce_damping
-            
-            # Update ball rotation
-            ball.update(dt)
+        # Update every ball's physics, one vectorized step at a time
+        engine = self.physics
+        holes = self.holes()
+        live = engine.live_mask()
+        engine.save_previous()
+        if self.continuous_collisions:
+            # Move each ball only up to its first contact with a wall, the game line or a
+            # bumper, bounce, and spend the rest of the step moving away from it
+            engine.accelerate(self.gravity, live, step)
+            self.score += engine.sweep(live, self.width, self.game_line_y, holes, self.bumpers,
+                                       self.bounce_damping, step,
+                                       min_line_speed=self.min_block_speed)  # Each bounce off the line is a block
+        else:
+            engine.integrate(self.gravity, live, step)
+        
+        # Check if ball fell through hole (the swept move leaves little to do from here on)
+        drained, blocked = engine.drain_holes(self.game_line_y, holes, self.height, live, self.min_block_speed)
+        self.score += blocked  # Increment score for each successful block
+        live &= ~drained
+        
+        # Check bumper collisions (only one bumper collision per frame)
+        x, y = engine.pos[:engine.count, 0], engine.pos[:engine.count, 1]
+        vx, vy = engine.vel[:engine.count, 0], engine.vel[:engine.count, 1]
+        unhit = live.copy()
+        before = engine.vel[:engine.count].copy()
+        for k, bumper in enumerate(self.bumpers):
+            hit = bumper.check_collisions(x, y, vx, vy, engine.radius[:engine.count], unhit)
+            if hit.any():
+                unhit &= ~hit
+                i = np.flatnonzero(hit)
+                collisions.emit_many(BUMPER, i, k, np.hypot(vx[i] - before[i, 0], vy[i] - before[i, 1]), x[i], y[i])
+        for k, bumper in enumerate(self.bumpers):
+            if bumper.hits:
+                self.events.append({"type": "bumper_hit", "frame": self.frame, "bumper": k,
+                                    "balls": bumper.hits, "active": bumper.is_active})
+                bumper.hits = 0
         
-        # Remove balls that fell through the hole (in reverse order to maintain indices)
-        for i in reversed(balls_to_remove):
-            self.balls.pop(i)
-            self.ball_velocities.pop(i)
+        # Bounce off walls and the solid parts of the game line
+        engine.bounce_walls(self.width, self.bounce_damping, live)
+        engine.bounce_line(self.game_line_y, holes, self.bounce_damping, live)
+        
+        # Update ball rotation
+        engine.rotate(dt, live)
+        
+        # Remove balls that fell through the hole; their slots go back to the engine's free list
+        if drained.any():
+            for i in np.flatnonzero(drained).tolist():
+                self.events.append({"type": "ball_drained", "frame": self.frame, "x": float(x[i])})
+                engine.remove_ball(i)
+            self.balls.keep(engine.alive[self.balls.slots])
         
         # Check for game over
         if len(self.balls) == 0 and not self.game_over:
             self.game_over = True
-            self.game_over_start_time = pygame.time.get_ticks()
+            self.game_over_start_time = self.time_ms
         
         # Check if game over duration has passed
-        if self.game_over and pygame.time.get_ticks() - self.game_over_start_time > self.game_over_duration:
+        if self.game_over and self.time_ms - self.game_over_start_time > self.game_over_duration:
             self.asking_restart = True
         
-        # Check ball-to-ball collisions
-        for i in range(len(self.balls)):
-            for j in range(i + 1, len(self.balls)):
-                self.check_ball_collision(
-                    self.balls[i], self.ball_velocities[i],
-                    self.balls[j], self.ball_velocities[j]
-                )
+        # Check ball-to-ball collisions, only for pairs the broad phase could not rule out
+        if len(self.balls) > 1:
+            with self.profiler.span("broadphase"):
+                slots = self.balls.slots
+                pairs = self.broadphase.find_pairs(slots, engine.pos[slots], engine.radius[slots])
+            with self.profiler.span("collisions"):
+                for i, j in pairs.tolist():
+                    ball1, ball2 = self.balls[i], self.balls[j]
+                    impulse = self.check_ball_collision(ball1, ball1.velocity, ball2, ball2.velocity)
+                    if impulse:
+                        collisions.emit(BALL, ball1.index, ball2.index, impulse,
+                                        (ball1.x + ball2.x) * 0.5, (ball1.y + ball2.y) * 0.5)
+        
+        collisions.publish(self.time_ms)
     
     def reset_game(self):
         """Reset the game to initial state"""
@@ -455,106 +676,595 @@ class BouncyBallApp:
         self.game_over_start_time = 0
         self.score = 0  # Reset score for new game
         
-        # Clear existing balls and velocities
+        # Clear existing balls
         self.balls.clear()
-        self.ball_velocities.clear()
+        self.physics.clear()
         
         # Reinitialize balls
         self.initialize_balls()
         
         # Reset bumpers to initial position
-        for bumper in self.bumpers:
-            bumper.x = (self.width - bumper.width) // 2
-            bumper.y = self.game_line_y - bumper.height - 20
+        for bumper, (x, y, _, _) in zip(self.bumpers, self.scene.bumpers):
+            bumper.x = x
+            bumper.y = y
     
-    def draw_grid(self):
+    def draw_grid(self, surface=None):
+        surface = surface or self.screen
         grid_size = 50
         for x in range(0, self.width, grid_size):
-            pygame.draw.line(self.screen, self.grid_color, (x, 0), (x, self.height))
+            pygame.draw.line(surface, self.grid_color, (x, 0), (x, self.height))
         for y in range(0, self.height, grid_size):
-            pygame.draw.line(self.screen, self.grid_color, (0, y), (self.width, y))
-    
-    def draw_game_line(self):
-        """Draw the game line with two holes in the middle"""
-        # Draw left segment of the line (before first hole)
-        pygame.draw.line(self.screen, self.line_color, (0, self.game_line_y), 
-                        (self.hole1_x, self.game_line_y), 3)
-        # Draw middle segment of the line (between holes)
-        pygame.draw.line(self.screen, self.line_color, (self.hole1_x + self.hole_width, self.game_line_y), 
-                        (self.hole2_x, self.game_line_y), 3)
-        # Draw right segment of the line (after second hole)
-        pygame.draw.line(self.screen, self.line_color, (self.hole2_x + self.hole_width, self.game_line_y), 
+            pygame.draw.line(surface, self.grid_color, (0, y), (self.width, y))
+    
+    def draw_game_line(self, surface=None):
+        """Draw the game line with its holes"""
+        surface = surface or self.screen
+        # Draw the solid segments between the holes, left to right
+        x = 0
+        for hole_x, hole_width in sorted(self.holes()):
+            pygame.draw.line(surface, self.line_color, (x, self.game_line_y), 
+                            (hole_x, self.game_line_y), 3)
+            x = hole_x + hole_width
+        pygame.draw.line(surface, self.line_color, (x, self.game_line_y), 
                         (self.width, self.game_line_y), 3)
     
-    def draw_info(self):
-        font = pygame.font.Font(None, 24)
+    def static_layout(self):
+        """Everything the static background depends on; it is rebuilt when this changes."""
+        return (self.screen.get_size(), self.bg_color, self.grid_color, self.line_color,
+                self.game_line_y, self.holes())
+    
+    def build_background(self):
+        """Draw the static layers (grid, game line with its holes) into a new Surface."""
+        background = pygame.Surface(self.screen.get_size())
+        if pygame.display.get_surface() is not None:
+            # Match the display's pixel format so the per-frame blit is a plain copy
+            background = background.convert()
+        background.fill(self.bg_color)
+        self.draw_grid(background)
+        self.draw_game_line(background)
+        return background
+    
+    def draw_background(self, restore=None):
+        """Blit the cached static layers, rebuilding them after a resize or layout change.
+
+        With a list of rects in restore, only those areas are blitted, unless
+        the background had to be rebuilt. Returns True if the whole screen was
+        covered.
+        """
+        layout = self.static_layout()
+        if self.background is None or layout != self.background_layout:
+            self.background = self.build_background()
+            self.background_layout = layout
+            restore = None
+        if restore is None:
+            self.screen.blit(self.background, (0, 0))
+            return True
+        for rect in restore:
+            self.screen.blit(self.background, rect, rect)
+        return False
+    
+    def draw_info(self, snapshot):
+        """Draw the HUD text for snapshot and return the rects it covers."""
+        text = self.text
+        screen = self.screen
+        drawn = []
         # Show info for first ball and remaining balls count
-        if self.balls:
-            ball = self.balls[0]
-            velocity = self.ball_velocities[0]
-            info_text = f"Balls Remaining: {len(self.balls)} | Ball 1: ({int(ball.x)}, {int(ball.y)}) | Speed: ({velocity[0]:.1f}, {velocity[1]:.1f})"
+        if snapshot.balls:
+            (x, y), velocity = snapshot.pos[0].tolist(), snapshot.vel[0].tolist()
+            info_text = f"Balls Remaining: {len(snapshot.balls)} | Ball 1: ({int(x)}, {int(y)}) | Speed: ({velocity[0]:.1f}, {velocity[1]:.1f})"
         else:
-            info_text = f"Balls Remaining: {len(self.balls)}"
-        text_surface = font.render(info_text, True, (100, 100, 100))
-        self.screen.blit(text_surface, (10, 10))
+            info_text = f"Balls Remaining: {len(snapshot.balls)}"
+        text_surface = text.render_slot("info", info_text, 24, (100, 100, 100))
+        drawn.append(screen.blit(text_surface, (10, 10)))
         
         # Draw score in top-right corner
-        score_text = f"Score: {self.score}"
-        score_surface = font.render(score_text, True, (255, 255, 0))  # Yellow color for score
+        score_text = f"Score: {snapshot.score}"
+        score_surface = text.render_slot("score", score_text, 24, (255, 255, 0))  # Yellow color for score
         score_rect = score_surface.get_rect()
         score_rect.topright = (self.width - 10, 10)
-        self.screen.blit(score_surface, score_rect)
+        drawn.append(screen.blit(score_surface, score_rect))
         
         # Draw flashing GAME OVER message
-        if self.game_over and not self.asking_restart:
-            game_over_font = pygame.font.Font(None, 72)
+        if snapshot.game_over and not snapshot.asking_restart:
             # Flash every 500ms
-            if (pygame.time.get_ticks() - self.game_over_start_time) // 500 % 2 == 0:
-                game_over_text = game_over_font.render("GAME OVER", True, (255, 0, 0))
+            if (snapshot.time_ms - snapshot.game_over_start_time) // 500 % 2 == 0:
+                game_over_text = text.render("GAME OVER", 72, (255, 0, 0))
                 text_rect = game_over_text.get_rect(center=(self.width // 2, self.height // 2))
-                self.screen.blit(game_over_text, text_rect)
+                drawn.append(screen.blit(game_over_text, text_rect))
         
         # Draw restart prompt
-        if self.asking_restart:
-            restart_font = pygame.font.Font(None, 48)
-            restart_text = restart_font.render("Shall we play again? (y/n)", True, (255, 255, 255))
+        if snapshot.asking_restart:
+            restart_text = text.render("Shall we play again? (y/n)", 48, (255, 255, 255))
             text_rect = restart_text.get_rect(center=(self.width // 2, self.height // 2))
-            self.screen.blit(restart_text, text_rect)
+            drawn.append(screen.blit(restart_text, text_rect))
         
         controls_text = "SPACE/Click: Activate Bumper | Arrow Keys: Move Bumper | ESC: Quit"
-        controls_surface = font.render(controls_text, True, (100, 100, 100))
-        self.screen.blit(controls_surface, (10, self.height - 30))
+        controls_surface = text.render(controls_text, 24, (100, 100, 100))
+        drawn.append(screen.blit(controls_surface, (10, self.height - 30)))
+        return drawn
+    
+    def step(self, dt):
+        """Advance the game by one frame of dt milliseconds."""
+        # Only update physics if game is not over and not asking for restart
+        if not self.game_over and not self.asking_restart:
+            self.update_physics(dt)
+        elif self.game_over and not self.asking_restart:
+            # Still update physics for game over detection
+            self.update_physics(dt)
+    
+    def capture(self, alpha=None):
+        """Copy what drawing reads into the front snapshot and return it."""
+        return self.front_snapshot.capture(self, alpha)
+    
+    def draw_frame(self, hud=True, alpha=None, dirty=False, snapshot=None):
+        """Draw the whole scene onto self.screen.
+
+        The game is drawn as captured in snapshot, or as it is now. With alpha,
+        balls are drawn that fraction of the way through the last physics step
+        (a snapshot brings its own alpha). Bumpers follow the input directly and
+        are not interpolated.
+
+        With dirty, only the areas drawn over last frame are restored from the
+        background, and the rects that changed are returned for a partial
+        display update. None means the whole screen was redrawn.
+        """
+        if snapshot is None:
+            snapshot = self.capture(alpha)
+        profiler = self.profiler
+        previous = self.drawn_rects if dirty else None
+        limit = self.max_dirty_fraction * self.width * self.height
+        if previous is not None and rects_area(previous) > limit:
+            previous = None  # So much changed that restoring the whole background is cheaper
+        # Static layers come from one cached Surface
+        with profiler.span("background"):
+            full = self.draw_background(previous)
+        
+        # Dynamic layers go on top: bumpers, balls, HUD
+        drawn = []
+        # Draw bumpers
+        with profiler.span("bumpers"):
+            for bumper in snapshot.bumpers:
+                drawn.append(bumper.draw(self.screen))
+        
+        # Draw all balls
+        with profiler.span("balls"):
+            self.plan_detail(snapshot)
+            drawn.extend(self.draw_balls(snapshot))
+        
+        if hud:
+            with profiler.span("info"):
+                drawn.extend(self.draw_info(snapshot))
+        
+        self.drawn_rects = drawn
+        if full or rects_area(previous) + rects_area(drawn) > limit:
+            return None
+        return merge_rects(previous, drawn)
+    
+    def plan_detail(self, snapshot):
+        """Choose how many dots every ball in snapshot draws this frame."""
+        balls = snapshot.balls
+        if self.lod is None or not balls:
+            return
+        n = len(balls)
+        num_points = np.fromiter((ball.num_points for ball in balls), dtype=np.float64, count=n)
+        shown = np.fromiter((math.nan if ball.lod_points is None else ball.lod_points for ball in balls),
+                            dtype=np.float64, count=n)
+        projected_radius = VectorDotBall.fov / VectorDotBall.viewer_distance * snapshot.radius
+        for ball, count in zip(balls, self.lod.plan(num_points, projected_radius, shown).tolist()):
+            ball.lod_points = count
+    
+    def draw_balls(self, snapshot):
+        """Draw every ball in snapshot, with one vectorized projection for all their dots.
+
+        Balls are drawn one after another, each with its far dots first. With
+        depth buckets, all the dots go out in a single blits call. Returns the
+        screen rect each ball may have drawn into.
+        """
+        balls = snapshot.balls
+        if not balls:
+            return []
+        buckets = VectorDotBall.depth_buckets
+        n = len(balls)
+        points = [ball.sphere_points() for ball in balls]
+        counts = [len(p) for p in points]
+        owner = np.repeat(np.arange(n), counts)  # Ball of every dot
+        px, py, pz = np.concatenate(points).T
+        
+        # Rotate every dot around X, then Y, by its ball's angles
+        angle = snapshot.angle
+        cos_x, sin_x = np.cos(angle[:, 0])[owner], np.sin(angle[:, 0])[owner]
+        cos_y, sin_y = np.cos(angle[:, 1])[owner], np.sin(angle[:, 1])[owner]
+        rx = cos_y * px + sin_y * sin_x * py + sin_y * cos_x * pz
+        ry = cos_x * py - sin_x * pz
+        z = -sin_y * px + cos_y * sin_x * py + cos_y * cos_x * pz
+        
+        # Perspective projection around each ball's (interpolated) center
+        if snapshot.alpha is None:
+            center = snapshot.pos
+        else:
+            center = snapshot.prev_pos + (snapshot.pos - snapshot.prev_pos) * snapshot.alpha
+        radius = snapshot.radius
+        factor = VectorDotBall.fov * radius[owner] / (VectorDotBall.viewer_distance - z)
+        x2d = (center[owner, 0] + rx * factor).astype(np.int32)
+        y2d = (center[owner, 1] + ry * factor).astype(np.int32)
+        
+        # Ball by ball, far dots first
+        order = np.lexsort((-z, owner))
+        if buckets:
+            sprites = []
+            offsets = []
+            first_sprite = {}  # Ball color -> index of its atlas' first sprite
+            base = np.empty(n, dtype=np.intp)
+            for i, ball in enumerate(balls):
+                color = tuple(ball.color)
+                start = first_sprite.get(color)
+                if start is None:
+                    atlas = get_atlas(color, buckets)
+                    start = first_sprite[color] = len(sprites)
+                    sprites.extend(atlas.sprites)
+                    offsets.append(atlas.offsets)
+                base[i] = start
+            sprite = base[owner[order]] + depth_bucket(z[order], buckets)
+            offset = np.concatenate(offsets)[sprite]
+            self.screen.blits([(sprites[s], (x, y)) for s, x, y in
+                               zip(sprite.tolist(), (x2d[order] - offset).tolist(), (y2d[order] - offset).tolist())],
+                              doreturn=False)
+        else:
+            # Depth shading: closer points are brighter and larger
+            xs, ys, z = x2d[order].tolist(), y2d[order].tolist(), z[order]
+            end = 0
+            for ball, count in zip(balls, counts):
+                start, end = end, end + count
+                colors, sizes = dot_shade(ball.color, z[start:end])
+                for x, y, color, size in zip(xs[start:end], ys[start:end], colors.tolist(), sizes.tolist()):
+                    pygame.draw.circle(self.screen, color, (x, y), size)
+        
+        # Points project at most fov / (viewer_distance - 1) radii out, and dots are up to 4 px
+        extent = np.ceil(VectorDotBall.fov / (VectorDotBall.viewer_distance - 1) * radius).astype(np.intp) + 6
+        left = center[:, 0].astype(np.intp) - extent
+        top = center[:, 1].astype(np.intp) - extent
+        return [pygame.Rect(x, y, 2 * e + 1, 2 * e + 1) for x, y, e in zip(left.tolist(), top.tolist(), extent.tolist())]
+    
+    def present(self, rects):
+        """Push a frame to the display: only rects if given and small enough, else everything."""
+        if rects is not None:
+            # Overlapping rects are counted twice, which errs towards a full flip
+            if rects_area(rects) <= self.max_dirty_fraction * self.width * self.height:
+                pygame.display.update(rects)
+                return
+        pygame.display.flip()
+    
+    def open_window(self, vsync=False):
+        if vsync:
+            try:
+                # pygame only honours vsync on SCALED or OpenGL displays
+                return pygame.display.set_mode((self.width, self.height), pygame.SCALED, vsync=1)
+            except pygame.error:
+                pass
+        return pygame.display.set_mode((self.width, self.height))
+    
+    def warm_up(self):
+        """Load what startup skipped and the first frame didn't need, one piece per next().
+
+        run_frame() advances this once after every frame until it is done, so
+        neither startup nor the first frame wait for it and nothing is loaded
+        mid-game, such as the large fonts first drawn at game over or the
+        geometry of balls that weren't on screen yet.
+        """
+        for num_points in np.unique(self.scene.balls["num_points"]).tolist():
+            precompute_spheres((num_points,))
+            yield True
+        for size in (48, 72):  # Restart prompt and GAME OVER
+            self.text.font(size)
+            yield True
+        self.profiler.load_font()
+        yield True
+    
+    def queue_input(self, bits, mouse_x):
+        """Hold one frame's input until the next physics step consumes it."""
+        self.pending_bits = (self.pending_bits & ~HELD_INPUTS) | bits
+        if mouse_x >= 0:
+            self.pending_mouse_x = mouse_x
+    
+    def step_fixed(self, dt):
+        """Run one fixed physics step with the queued input."""
+        bits, mouse_x = self.pending_bits, self.pending_mouse_x
+        # One-shot input is used once; held keys stay until the next frame's input replaces them
+        self.pending_bits &= HELD_INPUTS
+        self.pending_mouse_x = -1
+        self.advance(dt, bits, mouse_x)
     
     def run(self):
+        self.accumulator = 0.0
         while self.running:
-            dt = self.clock.tick(60)
-            self.handle_events()
-            
-            # Only update physics if game is not over and not asking for restart
-            if not self.game_over and not self.asking_restart:
-                self.update_physics(dt)
-            elif self.game_over and not self.asking_restart:
-                # Still update physics for game over detection
-                self.update_physics(dt)
-            
-            self.screen.fill(self.bg_color)
-            self.draw_grid()
-            
-            # Draw game line
-            self.draw_game_line()
-            
-            # Draw bumpers
-            for bumper in self.bumpers:
-                bumper.draw(self.screen)
-            
-            # Draw all balls
-            for ball in self.balls:
-                ball.draw(self.screen)
-            
-            self.draw_info()
-            pygame.display.flip()
+            visible = pygame.display.get_active()
+            frame_ms = self.clock.tick(self.render_fps if visible else self.hidden_fps)
+            self.run_frame(frame_ms, visible)
+        pygame.quit()
+    
+    def run_pipelined(self):
+        """Like run(), but each frame's physics runs on a worker thread while the frame before it is drawn.
+
+        The worker captures the game into the back snapshot after its physics
+        steps; once it and the drawing are both done, the snapshots swap and
+        the next frame draws what the worker captured. Drawing only ever reads
+        a snapshot, so it never sees a half-updated step. Frames reach the
+        screen one frame later than with run(). Input is read between frames,
+        while the worker is idle.
+
+        This only pays off on multi-core machines, and only for the parts of
+        each stage that release the GIL (NumPy kernels, SDL blits and the flip).
+        """
+        self.accumulator = 0.0
+        self.capture(0.0)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="physics") as worker:
+            while self.running:
+                visible = pygame.display.get_active()
+                frame_ms = self.clock.tick(self.render_fps if visible else self.hidden_fps)
+                work_start = time.perf_counter()
+                self.profiler.begin_frame()
+                with self.profiler.span("events"):
+                    self.queue_input(*self.handle_events())
+                simulated = worker.submit(self.simulate, frame_ms, visible, self.back_snapshot)
+                self.present_snapshot(self.front_snapshot if visible else None, work_start)
+                simulated.result()
+                self.front_snapshot, self.back_snapshot = self.back_snapshot, self.front_snapshot
+                self.profiler.end_frame()
+        pygame.quit()
+    
+    async def run_async(self, telemetry=None):
+        """Like run(), but waits between frames with asyncio.sleep so other tasks can run.
+
+        With a TelemetryServer, each frame's events and summary are published
+        to it after the frame.
+        """
+        import asyncio  # Imported here: it takes longer to import than the rest of the game's startup
+        
+        self.accumulator = 0.0
+        last = time.perf_counter()
+        while self.running:
+            visible = pygame.display.get_active()
+            fps = self.render_fps if visible else self.hidden_fps
+            delay = last + 1 / fps - time.perf_counter() if fps else 0.0
+            await asyncio.sleep(max(0.0, delay))
+            now = time.perf_counter()
+            frame_ms, last = (now - last) * 1000, now
+            self.run_frame(frame_ms, visible)
+            if telemetry is not None:
+                telemetry.publish_frame(self)
         pygame.quit()
+    
+    def run_frame(self, frame_ms, visible=True):
+        """One frame after frame_ms of wall time: input, the physics steps due, then drawing."""
+        work_start = time.perf_counter()
+        self.profiler.begin_frame()
+        with self.profiler.span("events"):
+            self.queue_input(*self.handle_events())
+        alpha = self.simulate(frame_ms, visible)
+        self.present_snapshot(self.capture(alpha) if visible else None, work_start)
+        self.profiler.end_frame()
+    
+    def simulate(self, frame_ms, visible=True, snapshot=None):
+        """Run the physics steps due after frame_ms of wall time.
+
+        Returns how far into the next step the leftover time reaches, as a
+        fraction of a step for drawing. If snapshot is given, the game is also
+        captured into it with that fraction.
+        """
+        physics_dt = 1000 / self.physics_hz
+        if visible:
+            # Don't try to catch up on a long stall all at once
+            frame_ms = min(frame_ms, self.max_frame_ms)
+        self.accumulator += frame_ms
+        with self.profiler.span("physics"):
+            while self.accumulator >= physics_dt and self.running:
+                self.step_fixed(physics_dt)
+                self.accumulator -= physics_dt
+        alpha = self.accumulator / physics_dt
+        if snapshot is not None:
+            snapshot.capture(self, alpha)
+        return alpha
+    
+    def present_snapshot(self, snapshot, work_start):
+        """Draw snapshot and present it; None while the window is hidden.
+
+        work_start is when the frame's work began, for the level-of-detail
+        frame time.
+        """
+        if snapshot is None:
+            self.drawn_rects = None  # Redraw everything once the window is shown again
+            return
+        profiler = self.profiler
+        rects = self.draw_frame(dirty=self.dirty_rects, snapshot=snapshot)
+        overlay = profiler.draw_overlay(self.screen)
+        if overlay is not None:
+            self.drawn_rects.append(overlay)
+            if rects is not None:
+                rects.append(overlay)
+        if self.lod is not None:
+            # Frame time up to the flip, which may wait for vsync
+            self.lod.update_quality((time.perf_counter() - work_start) * 1000)
+        with profiler.span("flip"):
+            self.present(rects)
+        if self.warming_up is not None and not next(self.warming_up, False):
+            self.warming_up = None
+
+
+class HeadlessSimulation(BouncyBallApp):
+    """Runs the game without a window, fonts or event pump.
+
+    Physics advances with a fixed dt as fast as the CPU allows. Rendering into
+    an offscreen Surface and frame limiting are both optional. Input comes from
+    held_input (INPUT_* bits applied every frame) instead of the keyboard.
+    """
+
+    def __init__(self, width=600, height=800, broadphase="grid", dt=1000 / 60, render=False, fps=None,
+                 seed=None, scene=None):
+        super().__init__(width, height, broadphase, headless=True, seed=seed, scene=scene)
+        self.dt = dt
+        self.render = render
+        self.fps = fps
+        self.held_input = 0
+        if render:
+            self.screen = pygame.Surface((self.width, self.height))
+    
+    def advance(self, dt, bits=0, mouse_x=-1):
+        if self.fps:
+            self.clock.tick(self.fps)
+        self.profiler.begin_frame()
+        with self.profiler.span("physics"):
+            super().advance(dt, bits, mouse_x)
+        if self.render:
+            self.draw_frame(hud=False)
+        self.profiler.end_frame()
+    
+    def run(self, max_frames=None):
+        """Step until the game asks to restart or max_frames is reached.
+
+        Returns the number of frames simulated by this call.
+        """
+        start = self.frame
+        while self.running and not self.asking_restart:
+            if max_frames is not None and self.frame - start >= max_frames:
+                break
+            self.advance(self.dt, self.held_input)
+        return self.frame - start
+
+
+def measure_startup(args, scene=None):
+    """Print the time spent importing, starting the game, drawing its first frame and warming up."""
+    start = time.perf_counter()
+    app = BouncyBallApp(broadphase=args.broadphase, seed=args.seed, physics_hz=args.physics_hz,
+                        render_fps=args.render_fps, vsync=args.vsync, dirty_rects=args.dirty_rects,
+                        scene=scene, point_budget=args.point_budget)
+    initialized = time.perf_counter()
+    app.warming_up = None  # Timed separately below
+    app.run_frame(1000 / app.physics_hz)
+    first_frame = time.perf_counter()
+    for _ in app.warm_up():
+        pass
+    warmed_up = time.perf_counter()
+    pygame.quit()
+    # Imports are timed from the top of this module, after the interpreter itself has started
+    print(f"Imports: {(start - IMPORT_START) * 1000:.1f} ms | Init: {(initialized - start) * 1000:.1f} ms | "
+          f"First frame: {(first_frame - initialized) * 1000:.1f} ms | "
+          f"Warm-up: {(warmed_up - first_frame) * 1000:.1f} ms")
+    print(f"Ready after {(first_frame - IMPORT_START) * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bouncy Vector Ball - Amiga Style (3D)")
+    parser.add_argument("--broadphase", choices=("grid", "sweep", "brute"), default="grid",
+                        help="Broad phase used for ball-ball collisions")
+    parser.add_argument("--scene", metavar="FILE",
+                        help="Load balls, bumpers, holes and physics constants from a scene file (see scene.py)")
+    parser.add_argument("--physics-hz", type=float, default=60,
+                        help="Physics steps per second, independent of the frame rate")
+    parser.add_argument("--render-fps", type=float, default=60,
+                        help="Frame rate limit for drawing (0 for uncapped)")
+    parser.add_argument("--vsync", action="store_true", help="Request a vsynced display")
+    parser.add_argument("--point-budget", type=int, default=20000,
+                        help="Dots drawn per frame over all balls before detail is reduced (0 disables LOD)")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="Redraw and update only the screen areas that changed each frame")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run the simulation without a window, as fast as possible")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="Headless: stop after this many frames (default: run until game over)")
+    parser.add_argument("--dt", type=float, default=1000 / 60,
+                        help="Headless: fixed timestep in milliseconds")
+    parser.add_argument("--render", action="store_true",
+                        help="Headless: also draw every frame into an offscreen surface")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="Headless: limit the simulation to this many frames per second")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the random number generators (default: random)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="Record the session's input and state snapshots to FILE")
+    parser.add_argument("--snapshot-interval", type=int, default=60,
+                        help="Frames between state snapshots when recording")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="Re-run a recorded session headlessly and verify it against its snapshots")
+    parser.add_argument("--depth-buckets", type=int, default=VectorDotBall.depth_buckets,
+                        help="Depth buckets for pre-rendered dot sprites (0 draws each dot as a circle)")
+    parser.add_argument("--telemetry", metavar="ADDRESS",
+                        help="Run on an asyncio loop and stream telemetry as JSON lines to clients "
+                             "connecting to HOST:PORT or a Unix socket path")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Simulate each frame on a worker thread while the previous one is drawn "
+                             "(for multi-core machines)")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Open the window, draw the first frame, print how long each startup phase took and exit")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="On exit, write per-stage timing spans as a Chrome trace-event JSON file")
+    args = parser.parse_args(argv)
+    if args.pipeline and args.telemetry:
+        parser.error("--pipeline can't be combined with --telemetry")
+    if args.seed is not None and not 0 <= args.seed < 2 ** 32:
+        parser.error("--seed must be in [0, 2**32)")
+    if not 1 <= args.snapshot_interval <= 0xFFFF:
+        parser.error("--snapshot-interval must be between 1 and 65535")
+    VectorDotBall.depth_buckets = args.depth_buckets
+    scene = load_scene(args.scene) if args.scene else None
+
+    if args.replay:
+        log = SessionLog.load(args.replay)
+        # Session logs don't store the scene; replay with the same --scene the session used
+        sim = HeadlessSimulation(log.width, log.height, log.broadphase, seed=log.seed, scene=scene)
+        replayer = Replayer(log)
+        start = time.perf_counter()
+        ok = replayer.run(sim)
+        elapsed = time.perf_counter() - start
+        print(f"Replayed {len(log.frames)} frames in {elapsed:.2f}s, "
+              f"checked {replayer.checked} snapshots")
+        for frame, fields in replayer.mismatches:
+            print(f"  Mismatch at frame {frame}: {', '.join(fields)}")
+        print("Replay OK" if ok else "Replay DIVERGED")
+        sys.exit(0 if ok else 1)
+
+    if args.measure_startup:
+        measure_startup(args, scene)
+        return
+
+    if not args.headless:
+        app = BouncyBallApp(broadphase=args.broadphase, seed=args.seed, physics_hz=args.physics_hz,
+                            render_fps=args.render_fps, vsync=args.vsync, dirty_rects=args.dirty_rects,
+                            scene=scene, point_budget=args.point_budget)
+        if args.record:
+            app.recorder = Recorder(args.record, app, args.snapshot_interval)
+        try:
+            if args.telemetry:
+                import asyncio
+                from telemetry import serve as serve_telemetry
+                asyncio.run(serve_telemetry(app, args.telemetry))
+            elif args.pipeline:
+                app.run_pipelined()
+            else:
+                app.run()
+        finally:
+            if app.recorder is not None:
+                app.recorder.close()
+            if args.trace:
+                app.profiler.export_chrome_trace(args.trace)
+        return
+
+    sim = HeadlessSimulation(broadphase=args.broadphase, dt=args.dt, render=args.render, fps=args.fps,
+                             seed=args.seed, scene=scene)
+    if args.record:
+        sim.recorder = Recorder(args.record, sim, args.snapshot_interval)
+    start = time.perf_counter()
+    try:
+        frames = sim.run(args.frames)
+    finally:
+        if sim.recorder is not None:
+            sim.recorder.close()
+        if args.trace:
+            sim.profiler.export_chrome_trace(args.trace)
+    elapsed = time.perf_counter() - start
+    print(f"Frames: {frames} | Simulated: {sim.time_ms / 1000:.1f}s | Wall: {elapsed:.2f}s "
+          f"({frames / max(elapsed, 1e-9):.0f} frames/s)")
+    print(f"Score: {sim.score} | Balls Remaining: {len(sim.balls)} | Game Over: {sim.game_over}")
+
 
 if __name__ == "__main__":
-    app = BouncyBallApp()
-    app.run() 
\ No newline at end of file
+    main()
@@ -0,0 +1,167 @@
+import numpy as np
+
+# Cell coordinates are packed into one int64 key: (cx + OFFSET) * STRIDE + (cy + OFFSET)
+_CELL_OFFSET = 1 << 20
+_CELL_STRIDE = 1 << 21
+
+
+def _expand(starts, counts):
+    """Expand per-row ranges [start, start + count) into flat (row, column) arrays."""
+    total = int(counts.sum())
+    rows = np.repeat(np.arange(len(counts)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    cols = np.repeat(starts, counts) + (np.arange(total) - first)
+    return rows, cols
+
+
+class BroadPhase:
+    """Base class for broad-phase ball-ball candidate pair finders.
+
+    find_pairs takes the live balls as parallel arrays (engine slot ids,
+    positions and radii, in ball-list order) and returns an (n, 2) array of
+    list positions i < j, sorted lexicographically so that the exact collision
+    response runs in the same order as a full i < j pair loop would.
+
+    The order the balls were sorted into last step is kept between calls and
+    used as the starting permutation for the next sort, so the per-step
+    rebuild only has to fix up balls that moved.
+
+    Candidates are found from positions at the start of the pass, but each
+    collision response pushes its balls apart, which can close the gap to a
+    third ball. Boxes are grown by `margin` pixels so such pairs are still
+    found in the common case of balls resting against each other. Such a
+    push is never more than a ball's size, so the margin is capped at the
+    largest radius to keep tiny, densely packed balls from pairing with
+    every ball a few pixels away.
+    """
+
+    name = "brute"
+    filter_overlap = False  # Whether candidates get a bounding box test
+
+    def __init__(self, margin=4.0):
+        self.margin = margin
+        self.rejected_pairs = 0  # Total pairs rejected since creation
+        self.last_rejected = 0
+        self.last_candidates = 0
+        self._previous_order = np.empty(0, dtype=np.intp)  # Engine slot ids
+
+    def _warm_order(self, slots):
+        """Last step's sort order mapped onto the current list, new balls appended."""
+        lookup = np.full(int(slots.max()) + 1, -1, dtype=np.intp)
+        lookup[slots] = np.arange(len(slots))
+        previous = self._previous_order[self._previous_order < len(lookup)]
+        order = lookup[previous]
+        order = order[order >= 0]
+        seen = np.zeros(len(slots), dtype=bool)
+        seen[order] = True
+        return np.concatenate((order, np.flatnonzero(~seen)))
+
+    def _sorted_order(self, slots, keys):
+        order = self._warm_order(slots)
+        # Stable sort of an almost sorted sequence is close to linear
+        order = order[np.argsort(keys[order], kind="stable")]
+        self._previous_order = slots[order]
+        return order
+
+    def _margin(self, radius):
+        return min(self.margin, float(radius.max()))
+
+    def _candidates(self, slots, pos, radius):
+        n = len(slots)
+        return np.triu_indices(n, k=1)
+
+    def find_pairs(self, slots, pos, radius):
+        n = len(slots)
+        total = n * (n - 1) // 2
+        if n < 2:
+            pairs = np.empty((0, 2), dtype=np.intp)
+        else:
+            a, b = self._candidates(slots, pos, radius)
+            i = np.minimum(a, b)
+            j = np.maximum(a, b)
+            if self.filter_overlap:
+                # Bounding box overlap test on the candidates
+                reach = radius[i] + radius[j] + self._margin(radius)
+                overlap = ((np.abs(pos[j, 0] - pos[i, 0]) < reach) &
+                           (np.abs(pos[j, 1] - pos[i, 1]) < reach))
+                i = i[overlap]
+                j = j[overlap]
+            order = np.lexsort((j, i))
+            pairs = np.column_stack((i[order], j[order]))
+        self.last_candidates = len(pairs)
+        self.last_rejected = total - len(pairs)
+        self.rejected_pairs += self.last_rejected
+        return pairs
+
+
+class UniformGrid(BroadPhase):
+    """Uniform grid with cells one max-diameter wide.
+
+    Any two touching balls have centers in the same or adjacent cells, so only
+    the cell itself and half of its eight neighbours need to be searched.
+    """
+
+    name = "grid"
+    filter_overlap = True
+    _neighbours = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, margin=4.0):
+        super().__init__(margin)
+        self.cell_size = 0.0
+
+    def _candidates(self, slots, pos, radius):
+        self.cell_size = max(2.0 * float(radius.max()) + self._margin(radius), 1.0)
+        cells = np.floor(pos / self.cell_size).astype(np.int64) + _CELL_OFFSET
+        keys = cells[:, 0] * _CELL_STRIDE + cells[:, 1]
+        order = self._sorted_order(slots, keys)
+        sorted_keys = keys[order]
+        n = len(order)
+
+        # Later balls in the same cell
+        hi = np.searchsorted(sorted_keys, sorted_keys, side="right")
+        lo = np.arange(1, n + 1)
+        rows, cols = _expand(lo, hi - lo)
+        a_parts, b_parts = [rows], [cols]
+
+        for dx, dy in self._neighbours:
+            neighbour_keys = sorted_keys + dx * _CELL_STRIDE + dy
+            lo = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+            hi = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+            rows, cols = _expand(lo, hi - lo)
+            a_parts.append(rows)
+            b_parts.append(cols)
+
+        return order[np.concatenate(a_parts)], order[np.concatenate(b_parts)]
+
+
+class SweepAndPrune(BroadPhase):
+    """Sort-and-sweep along x: only balls whose x extents overlap are paired."""
+
+    name = "sweep"
+    filter_overlap = True
+
+    def _candidates(self, slots, pos, radius):
+        half_margin = self._margin(radius) / 2
+        min_x = pos[:, 0] - radius - half_margin
+        order = self._sorted_order(slots, min_x)
+        sorted_min = min_x[order]
+        sorted_max = pos[order, 0] + radius[order] + half_margin
+        lo = np.arange(1, len(order) + 1)
+        hi = np.searchsorted(sorted_min, sorted_max, side="left")
+        rows, cols = _expand(lo, np.maximum(hi - lo, 0))
+        return order[rows], order[cols]
+
+
+BROADPHASES = {
+    "brute": BroadPhase,
+    "grid": UniformGrid,
+    "sweep": SweepAndPrune,
+}
+
+
+def make_broadphase(kind, **kwargs):
+    """Create a broad phase by name: 'grid', 'sweep' or 'brute'."""
+    try:
+        return BROADPHASES[kind](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown broad phase {kind!r}, expected one of {sorted(BROADPHASES)}") from None
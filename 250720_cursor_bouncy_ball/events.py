@@ -0,0 +1,165 @@
+"""Collision events recorded during each physics step, with subscriptions and per-second stats.
+
+Every contact the physics resolves (ball against ball, wall, game line or
+bumper) and every ball that drains through a hole is written as one
+EVENT_DTYPE record into a buffer that is allocated once and reused: it is
+cleared at the start of every step, filled during it and handed to the
+subscribers at the end. Subscribers get a view into that buffer, so they
+must copy anything they want to keep past the call.
+
+    def on_hits(events):
+        print(events[events["impulse"] > 5.0])
+
+    app.collisions.subscribe(on_hits, types=(BUMPER,))
+"""
+
+from collections import deque
+
+import numpy as np
+
+# Event types
+BALL = 0  # a, b: the two ball slots; position: midway between their centers
+WALL = 1  # b: 0 left, 1 right, 2 top
+LINE = 2  # Contact with a solid part of the game line; impulse 0 for balls resting on it
+BUMPER = 3  # b: bumper index
+DRAIN = 4  # Ball dropped out through a hole; impulse 0
+TYPE_NAMES = ("ball", "wall", "line", "bumper", "drain")
+
+# frame: physics step, a: ball slot, b: the other ball or surface (-1 for none),
+# impulse: change in the ball's speed, x, y: the ball's center unless noted above
+EVENT_DTYPE = np.dtype([("frame", "<u4"), ("type", "u1"), ("a", "<i4"), ("b", "<i4"),
+                        ("impulse", "<f4"), ("x", "<f4"), ("y", "<f4")])
+
+
+class HitStats:
+    """Event counts and impulse totals per type, aggregated per second of simulated time.
+
+    Each second also keeps a coarse grid of where its events happened, to
+    find the spots where collision storms start.
+    """
+
+    def __init__(self, width, height, cell_size=50, history=60):
+        self.cell_size = cell_size
+        self.cols = max(1, -(-int(width) // cell_size))
+        self.rows = max(1, -(-int(height) // cell_size))
+        self.second = 0  # Simulated second being aggregated
+        self.counts = np.zeros(len(TYPE_NAMES), dtype=np.int64)
+        self.impulse = np.zeros(len(TYPE_NAMES))
+        self.cells = np.zeros(self.rows * self.cols, dtype=np.int64)
+        self.history = deque(maxlen=history)  # Summaries of the last completed seconds, oldest first
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        """Call callback(summary) with the summary() of every second as it completes."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def add(self, events, time_ms):
+        """Count a step's events, closing the current second first if time_ms is past it."""
+        second = int(time_ms // 1000)
+        if second != self.second:
+            self._close(second)
+        if not len(events):
+            return
+        types = events["type"]
+        self.counts += np.bincount(types, minlength=len(TYPE_NAMES))
+        self.impulse += np.bincount(types, weights=events["impulse"], minlength=len(TYPE_NAMES))
+        col = np.clip((events["x"] // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        row = np.clip((events["y"] // self.cell_size).astype(np.intp), 0, self.rows - 1)
+        self.cells += np.bincount(row * self.cols + col, minlength=len(self.cells))
+
+    def summary(self, top=5):
+        """The current second as a JSON-serializable dict, with its top busiest grid cells."""
+        busiest = np.argsort(self.cells)[::-1][:top]
+        return {
+            "second": self.second,
+            "counts": dict(zip(TYPE_NAMES, self.counts.tolist())),
+            "impulse": dict(zip(TYPE_NAMES, self.impulse.round(3).tolist())),
+            # (x, y, events) for each cell, x and y at the cell's top-left corner
+            "hotspots": [((i % self.cols) * self.cell_size, (i // self.cols) * self.cell_size, n)
+                         for i, n in zip(busiest.tolist(), self.cells[busiest].tolist()) if n],
+        }
+
+    def _close(self, next_second):
+        summary = self.summary()
+        self.history.append(summary)
+        for callback in self.subscribers:
+            callback(summary)
+        self.second = next_second
+        self.counts[:] = 0
+        self.impulse[:] = 0
+        self.cells[:] = 0
+
+
+class CollisionEvents:
+    """Preallocated per-step buffer of EVENT_DTYPE records.
+
+    The buffer doubles in size when a step overflows it, so after the first
+    few storms recording allocates nothing but the small index arrays the
+    physics already builds.
+    """
+
+    def __init__(self, width, height, capacity=1024):
+        self.buffer = np.zeros(capacity, EVENT_DTYPE)
+        self.count = 0  # Events recorded this step
+        self.frame = 0
+        self.subscribers = []  # (callback, types or None)
+        self.stats = HitStats(width, height)
+
+    def reset(self, frame):
+        """Start recording the events of physics step frame."""
+        self.count = 0
+        self.frame = frame
+
+    def _reserve(self, n):
+        end = self.count + n
+        if end > len(self.buffer):
+            grown = np.zeros(max(end, 2 * len(self.buffer)), EVENT_DTYPE)
+            grown[:self.count] = self.buffer[:self.count]
+            self.buffer = grown
+        records = self.buffer[self.count:end]
+        self.count = end
+        return records
+
+    def emit(self, type, a, b, impulse, x, y):
+        """Record a single event."""
+        self._reserve(1)[0] = (self.frame, type, a, b, impulse, x, y)
+
+    def emit_many(self, type, a, b, impulse, x, y):
+        """Record one event per entry of a; the other fields are arrays like a or scalars."""
+        n = len(a)
+        if not n:
+            return
+        records = self._reserve(n)
+        records["frame"] = self.frame
+        records["type"] = type
+        records["a"] = a
+        records["b"] = b
+        records["impulse"] = impulse
+        records["x"] = x
+        records["y"] = y
+
+    def view(self):
+        """This step's events so far. Only valid until the next reset()."""
+        return self.buffer[:self.count]
+
+    def subscribe(self, callback, types=None):
+        """Call callback(events) after every step with the step's events, or only those of the given types.
+
+        Steps without matching events are skipped.
+        """
+        self.subscribers.append((callback, None if types is None else np.array(types, dtype=np.uint8)))
+
+    def unsubscribe(self, callback):
+        self.subscribers = [(cb, types) for cb, types in self.subscribers if cb != callback]
+
+    def publish(self, time_ms):
+        """Hand the step's events to the stats and every subscriber. Called at the end of each step."""
+        events = self.view()
+        self.stats.add(events, time_ms)
+        for callback, types in self.subscribers:
+            selected = events if types is None else events[np.isin(events["type"], types)]
+            if len(selected):
+                callback(selected)
@@ -0,0 +1,49 @@
+"""Level of detail: how many of its dots each ball draws this frame."""
+
+import numpy as np
+
+from profiler import FRAME_BUDGET_MS
+
+
+class LevelOfDetail:
+    """Picks a dot count per ball from its size on screen, a per-frame dot budget and the frame time.
+
+    Balls draw a prefix of a nested point set (spheres.nested_sphere), so
+    dropping dots only hides some of them and none move. Counts also change
+    by at most max_step of a ball's dots per frame, so detail fades in and out
+    a dot or two at a time instead of popping.
+    """
+
+    def __init__(self, point_budget=20000, full_detail_radius=24.0, min_points=6, max_step=0.05,
+                 target_ms=FRAME_BUDGET_MS):
+        self.point_budget = point_budget  # Dots drawn per frame over all balls
+        self.full_detail_radius = full_detail_radius  # Projected radius in pixels at which a ball draws every dot
+        self.min_points = min_points
+        self.max_step = max_step  # Largest change per frame, as a fraction of a ball's dots
+        self.target_ms = target_ms
+        self.quality = 1.0  # Scales every count; lowered while frames take longer than target_ms
+        self.min_quality = 0.1
+
+    def update_quality(self, frame_ms):
+        """Drop quality quickly while frames run over target, recover it slowly once they don't."""
+        if frame_ms > self.target_ms:
+            self.quality = max(self.min_quality, self.quality * 0.9)
+        elif frame_ms < 0.8 * self.target_ms:
+            self.quality = min(1.0, self.quality * 1.02)
+
+    def plan(self, num_points, projected_radius, shown):
+        """Dot counts for this frame.
+
+        Takes each ball's full dot count, projected radius and the count it
+        showed last frame (NaN for new balls, which start at their target).
+        Returns float counts; a ball draws int(count) dots.
+        """
+        num_points = np.asarray(num_points, dtype=np.float64)
+        target = num_points * np.minimum(1.0, projected_radius / self.full_detail_radius) * self.quality
+        target = np.clip(target, np.minimum(self.min_points, num_points), num_points)
+        total = target.sum()
+        if total > self.point_budget:
+            # Past the budget, balls may drop below min_points, down to a single dot
+            target = np.maximum(1.0, target * (self.point_budget / total))
+        step = np.maximum(1.0, num_points * self.max_step)
+        return np.where(np.isnan(shown), target, shown + np.clip(target - shown, -step, step))
@@ -0,0 +1,290 @@
+import numpy as np
+
+from events import BUMPER, DRAIN, LINE, WALL
+
+
+class PhysicsEngine:
+    """Structure-of-arrays store for ball state with vectorized physics steps.
+
+    Every ball owns one slot in a set of contiguous arrays. Slots are never
+    moved, so a slot index stays valid for the lifetime of the ball; removed
+    balls are marked dead in the alive mask and their slots are kept on a
+    free list for the next balls added. Each step below operates on all used
+    slots at once and takes a boolean mask selecting the balls it applies to.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0  # Number of slots handed out so far, live or free
+        self.free = []  # Dead slots below count, reused last-freed first
+        self.pos = np.zeros((capacity, 2))
+        self.prev_pos = np.zeros((capacity, 2))  # Positions before the last step, for interpolation
+        self.vel = np.zeros((capacity, 2))
+        self.radius = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.angle = np.zeros((capacity, 2))  # Rotation around X and Y axes
+        self.spin = np.zeros((capacity, 2))  # Rotation speed around X and Y axes
+        self.events = None  # Optional events.CollisionEvents that every contact below is recorded into
+
+    @property
+    def capacity(self):
+        return len(self.radius)
+
+    def _grow(self, min_capacity=0):
+        new_capacity = max(1, self.capacity * 2, min_capacity)
+        for name in ("pos", "prev_pos", "vel", "radius", "alive", "angle", "spin"):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _allocate(self, n):
+        """Indices of n slots for new balls: free slots first, then new ones past count."""
+        reused = [self.free.pop() for _ in range(min(n, len(self.free)))]
+        fresh = n - len(reused)
+        if self.count + fresh > self.capacity:
+            self._grow(self.count + fresh)
+        slots = np.concatenate((np.array(reused, dtype=np.intp), np.arange(self.count, self.count + fresh)))
+        self.count += fresh
+        return slots
+
+    def add_ball(self, x, y, radius, vx=0.0, vy=0.0, spin=(0.0015, 0.0025)):
+        """Allocate a slot for a new ball and return its index."""
+        if self.free:
+            i = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow()
+            i = self.count
+            self.count += 1
+        self.pos[i] = (x, y)
+        self.prev_pos[i] = (x, y)
+        self.vel[i] = (vx, vy)
+        self.radius[i] = radius
+        self.angle[i] = 0.0
+        self.spin[i] = spin
+        self.alive[i] = True
+        return i
+
+    def add_balls(self, pos, vel, radius, spin=(0.0015, 0.0025)):
+        """Allocate slots for many balls at once from (n, 2), (n, 2) and (n,) arrays.
+
+        Returns the new slot indices.
+        """
+        new = self._allocate(len(radius))
+        self.pos[new] = pos
+        self.prev_pos[new] = pos
+        self.vel[new] = vel
+        self.radius[new] = radius
+        self.angle[new] = 0.0
+        self.spin[new] = spin
+        self.alive[new] = True
+        return new
+
+    def remove_ball(self, i):
+        if self.alive[i]:
+            self.alive[i] = False
+            self.free.append(i)
+
+    def clear(self):
+        self.alive[:self.count] = False
+        self.count = 0
+        self.free.clear()
+
+    def live_mask(self):
+        """Boolean mask over the used slots selecting live balls."""
+        return self.alive[:self.count].copy()
+
+    def _views(self):
+        n = self.count
+        return self.pos[:n, 0], self.pos[:n, 1], self.vel[:n, 0], self.vel[:n, 1], self.radius[:n]
+
+    def _emit(self, type, mask, b, impulse=0.0):
+        """Record an event for every ball in mask; impulse is per ball in mask or a scalar."""
+        a = np.flatnonzero(mask)
+        self.events.emit_many(type, a, b, impulse, self.pos[a, 0], self.pos[a, 1])
+
+    def save_previous(self):
+        """Remember the current positions as the start of the next step."""
+        n = self.count
+        self.prev_pos[:n] = self.pos[:n]
+
+    # Velocities and gravity are in pixels per reference frame; `step` is the
+    # length of the current step in reference frames.
+
+    def accelerate(self, gravity, mask, step=1.0):
+        """Apply gravity to every ball's velocity."""
+        self.vel[:self.count, 1][mask] += gravity * step
+
+    def integrate(self, gravity, mask, step=1.0):
+        """Apply gravity, then move every ball by its velocity."""
+        x, y, vx, vy, _ = self._views()
+        vy[mask] += gravity * step
+        x[mask] += vx[mask] * step
+        y[mask] += vy[mask] * step
+
+    def sweep(self, mask, width, line_y, holes, obstacles, damping, step=1.0, max_contacts=4, min_line_speed=0.0):
+        """Move every ball by its velocity with continuous collision detection.
+
+        Each ball is swept along its path and stopped at its earliest time of
+        impact with the left, right or top wall, a solid part of the game line
+        or an obstacle. Its velocity is then reflected and it spends the rest of
+        the step moving from the contact point, up to max_contacts times per
+        step; any motion left after that is applied without checks and left to
+        the overlap tests. Obstacles provide rect() -> (x, y, width, height) and
+        bounce(x, vx, vy, mask), which is used for hits on their top face; hits
+        on their sides and bottom are reflected with damping.
+
+        Returns the number of contacts with the game line made at a speed of at
+        least min_line_speed towards it.
+        """
+        events = self.events
+        x, y, vx, vy, r = self._views()
+        remaining = mask * float(step)  # Reference frames of motion left in this step
+        line_contacts = 0
+        rects = [obstacle.rect() for obstacle in obstacles]
+        for _ in range(max_contacts):
+            moving = remaining > 0
+            if not moving.any():
+                break
+            dx = vx * remaining
+            dy = vy * remaining
+            toi = np.full(len(x), np.inf)
+            surface = np.full(len(x), -1)  # What each ball hits first, see the codes below
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # 0: left wall, 1: right wall, 2: top wall, 3: game line
+                planes = (
+                    ((r - x) / dx, moving & (dx < 0) & (x >= r)),
+                    ((width - r - x) / dx, moving & (dx > 0) & (x <= width - r)),
+                    ((r - y) / dy, moving & (dy < 0) & (y >= r)),
+                    ((line_y - r - y) / dy, moving & (dy > 0) & (y + r <= line_y)),
+                )
+                for code, (t, valid) in enumerate(planes):
+                    valid = valid & (t <= 1)
+                    if code == 3:
+                        # The line only stops balls whose center is not over a hole at impact
+                        valid &= ~self.in_holes(x + dx * t, holes)
+                    closer = valid & (t < toi)
+                    toi[closer] = t[closer]
+                    surface[closer] = code
+
+                # 4 + 3k + face: obstacle k, face 0 top, 1 bottom, 2 sides.
+                # A circle against a box is a point against the box grown by the radius.
+                for k, (bx, by, bw, bh) in enumerate(rects):
+                    tx0 = (bx - r - x) / dx
+                    tx1 = (bx + bw + r - x) / dx
+                    ty0 = (by - r - y) / dy
+                    ty1 = (by + bh + r - y) / dy
+                    # Axes with no motion: the whole step if inside the slab, never otherwise
+                    inside_x = (x > bx - r) & (x < bx + bw + r)
+                    inside_y = (y > by - r) & (y < by + bh + r)
+                    tx_enter = np.where(dx == 0, np.where(inside_x, -np.inf, np.inf), np.minimum(tx0, tx1))
+                    tx_exit = np.where(dx == 0, np.where(inside_x, np.inf, -np.inf), np.maximum(tx0, tx1))
+                    ty_enter = np.where(dy == 0, np.where(inside_y, -np.inf, np.inf), np.minimum(ty0, ty1))
+                    ty_exit = np.where(dy == 0, np.where(inside_y, np.inf, -np.inf), np.maximum(ty0, ty1))
+                    t_enter = np.maximum(tx_enter, ty_enter)
+                    t_exit = np.minimum(tx_exit, ty_exit)
+                    # Balls already overlapping are left to the overlap test
+                    valid = moving & (t_enter >= 0) & (t_enter <= 1) & (t_enter < t_exit)
+                    closer = valid & (t_enter < toi)
+                    toi[closer] = t_enter[closer]
+                    face = np.where(ty_enter >= tx_enter, np.where(dy > 0, 0, 1), 2)
+                    surface[closer] = 4 + 3 * k + face[closer]
+
+            hit = surface >= 0
+            t = np.where(hit, toi, 1.0)
+            x[moving] += dx[moving] * t[moving]
+            y[moving] += dy[moving] * t[moving]
+            remaining = np.where(hit, remaining * (1 - t), 0.0)  # t is a fraction of the motion left
+
+            if events is not None:
+                contact = np.flatnonzero(hit)
+                before_vx, before_vy = vx[contact], vy[contact]
+
+            side = (surface == 0) | (surface == 1)
+            vx[side] = -vx[side] * damping
+            top = surface == 2
+            vy[top] = -vy[top] * damping
+            line = surface == 3
+            line_contacts += int(np.count_nonzero(line & (vy >= min_line_speed)))
+            vy[line] = -vy[line] * damping
+            for k, obstacle in enumerate(obstacles):
+                top_face = surface == 4 + 3 * k
+                if top_face.any():
+                    obstacle.bounce(x, vx, vy, top_face)
+                bottom_face = surface == 5 + 3 * k
+                vy[bottom_face] = np.abs(vy[bottom_face]) * damping
+                side_face = surface == 6 + 3 * k
+                vx[side_face] = -vx[side_face] * damping
+
+            if events is not None and len(contact):
+                code = surface[contact]
+                obstacle = code >= 4
+                events.emit_many(np.where(obstacle, BUMPER, np.where(code == 3, LINE, WALL)), contact,
+                                 np.where(obstacle, (code - 4) // 3, np.where(code == 3, -1, code)),
+                                 np.hypot(vx[contact] - before_vx, vy[contact] - before_vy),
+                                 x[contact], y[contact])
+
+        # Out of contacts: finish the step unchecked
+        left = remaining > 0
+        x[left] += vx[left] * remaining[left]
+        y[left] += vy[left] * remaining[left]
+        return line_contacts
+
+    @staticmethod
+    def in_holes(x, holes):
+        """Mask of balls whose center lies over any of the (x, width) holes."""
+        result = np.zeros(len(x), dtype=bool)
+        for hole_x, hole_width in holes:
+            result |= (x >= hole_x) & (x <= hole_x + hole_width)
+        return result
+
+    def drain_holes(self, line_y, holes, height, mask, min_line_speed=0.0):
+        """Handle balls below the game line.
+
+        Balls over a hole that have dropped out of the window are returned as
+        drained. Balls below the line but not over a hole are snapped back onto
+        it; the number of those still moving down at min_line_speed or faster
+        is returned as the blocked count.
+        """
+        x, y, _, vy, r = self._views()
+        below = mask & (y + r > line_y)
+        over_hole = self.in_holes(x, holes)
+        drained = below & over_hole & (y - r > height)
+        blocked = below & ~over_hole
+        y[blocked] = line_y - r[blocked]
+        if self.events is not None:
+            self._emit(LINE, blocked, -1)
+            self._emit(DRAIN, drained, -1)
+        return drained, int(np.count_nonzero(blocked & (vy >= min_line_speed)))
+
+    def bounce_walls(self, width, damping, mask):
+        """Bounce balls off the left, right and top walls."""
+        x, y, vx, vy, r = self._views()
+        left = mask & (x - r <= 0)
+        right = mask & ~left & (x + r >= width)
+        x[left] = r[left]
+        x[right] = width - r[right]
+        side = left | right
+        if self.events is not None:
+            self._emit(WALL, left, 0, np.abs(vx[left]) * (1 + damping))
+            self._emit(WALL, right, 1, np.abs(vx[right]) * (1 + damping))
+        vx[side] = -vx[side] * damping
+        top = mask & (y - r <= 0)
+        y[top] = r[top]
+        if self.events is not None:
+            self._emit(WALL, top, 2, np.abs(vy[top]) * (1 + damping))
+        vy[top] = -vy[top] * damping
+
+    def bounce_line(self, line_y, holes, damping, mask):
+        """Bounce balls off the solid parts of the game line."""
+        x, y, _, vy, r = self._views()
+        hit = mask & (y + r >= line_y) & ~self.in_holes(x, holes)
+        y[hit] = line_y - r[hit]
+        if self.events is not None:
+            self._emit(LINE, hit, -1, np.abs(vy[hit]) * (1 + damping))
+        vy[hit] = -vy[hit] * damping
+
+    def rotate(self, dt, mask):
+        """Advance every ball's rotation angles."""
+        n = self.count
+        self.angle[:n][mask] += self.spin[:n][mask] * dt
@@ -0,0 +1,200 @@
+"""Per-frame timing spans, an on-screen overlay and Chrome trace export."""
+
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class _Span:
+    """Reusable context manager that times one named stage."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_span(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class FrameProfiler:
+    """Collects timing spans for every frame stage into ring buffers.
+
+    Wrap each stage in `with profiler.span("physics"):` and call begin_frame /
+    end_frame around each frame. The last `history` frames of per-stage and
+    whole-frame times are kept for the overlay; the last `trace_capacity`
+    spans are kept for export as Chrome trace events, one track per thread.
+    Stages may run on different threads at once, but each stage name must
+    only be timed by one thread at a time.
+    """
+
+    def __init__(self, history=240, trace_capacity=100_000, enabled=True):
+        self.enabled = enabled
+        self.history = history
+        self.overlay_visible = False
+        self.frame = 0
+        self.frame_start = None
+        self.frame_times = deque(maxlen=history)  # Milliseconds
+        self.stage_times = {}  # Stage name -> deque of per-frame milliseconds
+        self.trace = deque(maxlen=trace_capacity)  # (name, start, end, frame, thread) in perf_counter seconds
+        self._current = {}  # Stage name -> milliseconds so far in this frame
+        self._spans = {}
+        self._epoch = time.perf_counter()
+        self._font = None
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        span = self._spans.get(name)
+        if span is None:
+            span = self._spans[name] = _Span(self, name)
+        return span
+
+    def add_span(self, name, start, end):
+        self._current[name] = self._current.get(name, 0.0) + (end - start) * 1000
+        self.trace.append((name, start, end, self.frame, threading.get_ident()))
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = time.perf_counter()
+        self._current = {}
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter()
+        self.frame_times.append((end - self.frame_start) * 1000)
+        self.trace.append(("frame", self.frame_start, end, self.frame, threading.get_ident()))
+        for name, ms in self._current.items():
+            times = self.stage_times.get(name)
+            if times is None:
+                times = self.stage_times[name] = deque(maxlen=self.history)
+            times.append(ms)
+        # Stages that did not run this frame count as zero
+        for name, times in self.stage_times.items():
+            if name not in self._current:
+                times.append(0.0)
+        self.frame += 1
+
+    def last_frame(self):
+        """Milliseconds of the last finished frame and of each of its stages."""
+        if not self.frame_times:
+            return 0.0, {}
+        return self.frame_times[-1], dict(self._current)
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+
+    def fps(self):
+        if not self.frame_times:
+            return 0.0
+        return 1000.0 / max(np.mean(self.frame_times), 1e-6)
+
+    def stage_means(self):
+        """Average milliseconds per frame for each stage, slowest first."""
+        means = [(name, float(np.mean(times))) for name, times in self.stage_times.items() if times]
+        return sorted(means, key=lambda item: item[1], reverse=True)
+
+    def load_font(self):
+        """The overlay's font, loaded on first use."""
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(None, 18)
+        return self._font
+
+    def draw_overlay(self, screen, pos=(10, 40), bin_ms=2, max_ms=40):
+        """Draw FPS, a frame-time histogram and per-stage milliseconds.
+
+        Returns the rect of the panel, or None when the overlay is hidden.
+        """
+        if not self.overlay_visible:
+            return None
+        font = self.load_font()
+        x, y = pos
+        width = 220
+        num_bins = max_ms // bin_ms
+        line_height = 14
+        stages = self.stage_means()
+        height = 20 + 60 + 8 + line_height * len(stages)
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        screen.blit(panel, (x, y))
+
+        frame_times = np.asarray(self.frame_times)
+        if len(frame_times):
+            worst = frame_times.max()
+            over = np.mean(frame_times > FRAME_BUDGET_MS) * 100
+        else:
+            worst = over = 0.0
+        header = f"FPS {self.fps():5.1f}  max {worst:5.1f} ms  over {over:3.0f}%"
+        screen.blit(font.render(header, True, (255, 255, 255)), (x + 4, y + 4))
+
+        # Frame-time histogram; the last bin collects everything slower than max_ms
+        chart_top = y + 20
+        chart_height = 60
+        bar_width = (width - 8) // num_bins
+        if len(frame_times):
+            counts, _ = np.histogram(np.minimum(frame_times, max_ms - 1e-6), bins=num_bins, range=(0, max_ms))
+            peak = max(int(counts.max()), 1)
+            for i, count in enumerate(counts.tolist()):
+                bar_height = int(chart_height * count / peak)
+                over_budget = (i + 1) * bin_ms > FRAME_BUDGET_MS
+                color = (220, 80, 80) if over_budget else (80, 200, 80)
+                pygame.draw.rect(screen, color, (x + 4 + i * bar_width, chart_top + chart_height - bar_height,
+                                                 bar_width - 1, bar_height))
+        budget_x = x + 4 + int(FRAME_BUDGET_MS / bin_ms * bar_width)
+        pygame.draw.line(screen, (255, 255, 0), (budget_x, chart_top), (budget_x, chart_top + chart_height))
+
+        text_y = chart_top + chart_height + 8
+        for name, ms in stages:
+            screen.blit(font.render(name, True, (200, 200, 200)), (x + 4, text_y))
+            value = font.render(f"{ms:.2f} ms", True, (200, 200, 200))
+            screen.blit(value, value.get_rect(topright=(x + width - 4, text_y)))
+            text_y += line_height
+        return pygame.Rect(x, y, width, height)
+
+    def export_chrome_trace(self, path):
+        """Write the buffered spans as a Chrome trace-event JSON file (chrome://tracing, Perfetto)."""
+        events = []
+        tids = {}  # Thread ident -> trace thread id, numbered in order of first appearance
+        for name, start, end, frame, thread in self.trace:
+            events.append({
+                "name": name,
+                "cat": "frame" if name == "frame" else "stage",
+                "ph": "X",
+                "ts": (start - self._epoch) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": 1,
+                "tid": tids.setdefault(thread, len(tids) + 1),
+                "args": {"frame": frame},
+            })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
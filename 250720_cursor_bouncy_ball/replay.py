@@ -0,0 +1,181 @@
+"""Deterministic record/replay of game sessions.
+
+A session log is a small binary file: a header with the RNG seed and world
+setup, then one 4-byte record per frame (input bitmask, mouse x), a 9-byte
+record whenever the frame dt changes, and a full state snapshot every
+snapshot_interval frames. Replaying feeds the same inputs into a headless
+simulation and compares its state against each snapshot.
+"""
+
+import struct
+from dataclasses import dataclass, field
+
+import numpy as np
+
+MAGIC = b"BBRP"
+VERSION = 3  # 3: blocks only count bounces, so version 2 sessions no longer replay to the same score
+
+_HEADER = struct.Struct("<4sHQHHH16s")  # magic, version, seed, width, height, snapshot interval, broadphase
+_FRAME = struct.Struct("<cBh")  # tag, input bits, mouse x (-1 if the mouse did not move)
+_DT = struct.Struct("<cd")  # tag, new dt in milliseconds
+_SNAPSHOT = struct.Struct("<cIqdBBBI")  # tag, frame, score, time, game over, asking restart, bumpers, balls
+_BUMPER = struct.Struct("<dBd")  # x, is active, activation duration (frames)
+
+_TAG_FRAME = b"F"
+_TAG_DT = b"D"
+_TAG_SNAPSHOT = b"S"
+
+
+@dataclass
+class Snapshot:
+    frame: int
+    score: int
+    time_ms: float
+    game_over: bool
+    asking_restart: bool
+    bumpers: list  # (x, is_active, activation_duration) per bumper
+    balls: np.ndarray  # (n, 4) array of x, y, vx, vy
+
+    def mismatches(self, other, tolerance=0.0):
+        """Names of the fields that differ from another snapshot."""
+        fields = []
+        for name in ("score", "game_over", "asking_restart", "bumpers"):
+            if getattr(self, name) != getattr(other, name):
+                fields.append(name)
+        if abs(self.time_ms - other.time_ms) > tolerance:
+            fields.append("time_ms")
+        if (self.balls.shape != other.balls.shape or
+                not np.allclose(self.balls, other.balls, rtol=0.0, atol=tolerance)):
+            fields.append("balls")
+        return fields
+
+
+def capture_state(app):
+    """Take a Snapshot of a BouncyBallApp."""
+    slots = app.balls.slots
+    balls = np.column_stack((app.physics.pos[slots], app.physics.vel[slots]))
+    bumpers = [(float(bumper.x), bool(bumper.is_active), float(bumper.activation_duration))
+               for bumper in app.bumpers]
+    return Snapshot(app.frame, int(app.score), float(app.time_ms), bool(app.game_over),
+                    bool(app.asking_restart), bumpers, balls)
+
+
+class Recorder:
+    """Writes a session log while a game runs.
+
+    Attach to an app with app.recorder = Recorder(path, app); the app calls
+    record() after every frame.
+    """
+
+    def __init__(self, path, app, snapshot_interval=60):
+        # The header stores the interval as an unsigned 16-bit field
+        if not 1 <= snapshot_interval <= 0xFFFF:
+            raise ValueError(f"snapshot_interval must be between 1 and 65535, got {snapshot_interval}")
+        self.snapshot_interval = snapshot_interval
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(MAGIC, VERSION, app.seed, app.width, app.height,
+                                     snapshot_interval, app.broadphase.name.encode()))
+        self.dt = None
+        self.write_snapshot(capture_state(app))
+
+    def record(self, app, dt, bits, mouse_x):
+        if dt != self.dt:
+            self.file.write(_DT.pack(_TAG_DT, dt))
+            self.dt = dt
+        self.file.write(_FRAME.pack(_TAG_FRAME, bits, mouse_x))
+        if app.frame % self.snapshot_interval == 0:
+            self.write_snapshot(capture_state(app))
+
+    def write_snapshot(self, snapshot):
+        self.file.write(_SNAPSHOT.pack(_TAG_SNAPSHOT, snapshot.frame, snapshot.score, snapshot.time_ms,
+                                       snapshot.game_over, snapshot.asking_restart,
+                                       len(snapshot.bumpers), len(snapshot.balls)))
+        for bumper in snapshot.bumpers:
+            self.file.write(_BUMPER.pack(*bumper))
+        self.file.write(snapshot.balls.astype("<f8").tobytes())
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@dataclass
+class SessionLog:
+    seed: int
+    width: int
+    height: int
+    snapshot_interval: int
+    broadphase: str
+    frames: list = field(default_factory=list)  # (dt, bits, mouse_x) per frame
+    snapshots: dict = field(default_factory=dict)  # frame -> Snapshot
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, width, height, interval, broadphase = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported session log version {version}")
+        log = cls(seed, width, height, interval, broadphase.rstrip(b"\0").decode())
+
+        offset = _HEADER.size
+        dt = None
+        while offset < len(data):
+            tag = data[offset:offset + 1]
+            if tag == _TAG_FRAME:
+                _, bits, mouse_x = _FRAME.unpack_from(data, offset)
+                log.frames.append((dt, bits, mouse_x))
+                offset += _FRAME.size
+            elif tag == _TAG_DT:
+                _, dt = _DT.unpack_from(data, offset)
+                offset += _DT.size
+            elif tag == _TAG_SNAPSHOT:
+                (_, frame, score, time_ms, game_over, asking_restart,
+                 num_bumpers, num_balls) = _SNAPSHOT.unpack_from(data, offset)
+                offset += _SNAPSHOT.size
+                bumpers = []
+                for _ in range(num_bumpers):
+                    x, active, duration = _BUMPER.unpack_from(data, offset)
+                    bumpers.append((x, bool(active), duration))
+                    offset += _BUMPER.size
+                balls = np.frombuffer(data, dtype="<f8", count=num_balls * 4, offset=offset).reshape(-1, 4)
+                offset += balls.nbytes
+                log.snapshots[frame] = Snapshot(frame, score, time_ms, bool(game_over), bool(asking_restart),
+                                                bumpers, balls)
+            else:
+                raise ValueError(f"Corrupt session log: unknown record {tag!r} at offset {offset}")
+        return log
+
+
+class Replayer:
+    """Re-runs a recorded session on a headless simulation and checks it against the snapshots."""
+
+    def __init__(self, log):
+        self.log = log
+        self.mismatches = []  # (frame, [field names]) for every snapshot that differed
+        self.checked = 0
+
+    def run(self, sim, tolerance=0.0):
+        """Replay every frame on sim. Returns True if all snapshots matched."""
+        self._check(sim, tolerance)
+        for dt, bits, mouse_x in self.log.frames:
+            sim.advance(dt, bits, mouse_x)
+            self._check(sim, tolerance)
+        return not self.mismatches
+
+    def _check(self, sim, tolerance):
+        expected = self.log.snapshots.get(sim.frame)
+        if expected is None:
+            return
+        self.checked += 1
+        fields = capture_state(sim).mismatches(expected, tolerance)
+        if fields:
+            self.mismatches.append((sim.frame, fields))
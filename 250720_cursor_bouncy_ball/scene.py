@@ -0,0 +1,212 @@
+"""Declarative scene files: balls, bumpers, holes and physics constants.
+
+A scene is stored either as JSON, for editing by hand, or in a compact
+binary form for very large scenes. The binary file is a small header, the
+holes and bumpers, then one fixed-size record per ball; load_scene()
+memory-maps the ball records, so even 100k+ balls are read straight into
+the physics arrays without building an object per ball.
+
+    python scene.py level.json
+    python scene.py --balls 100000 --seed 1 stress.bbscene
+"""
+
+import argparse
+import json
+import math
+import struct
+from dataclasses import dataclass, field
+
+import numpy as np
+
+MAGIC = b"BBSC"
+VERSION = 1
+
+# magic, version, width, height, game line y, gravity, bounce damping, bumper speed, holes, bumpers, balls;
+# padded to 64 bytes so every record after it stays 8-byte aligned
+_HEADER = struct.Struct("<4sHHH6xdddd3I4x")
+_HOLE = np.dtype([("x", "<f8"), ("width", "<f8")])
+_BUMPER = np.dtype([("x", "<f8"), ("y", "<f8"), ("width", "<f8"), ("height", "<f8")])
+BALL_DTYPE = np.dtype([("x", "<f8"), ("y", "<f8"), ("vx", "<f8"), ("vy", "<f8"), ("radius", "<f8"),
+                       ("num_points", "<u2"), ("color", "u1", (3,)), ("_pad", "u1", (3,))])
+
+BINARY_SUFFIXES = (".bbscene", ".bin")
+
+
+@dataclass
+class Scene:
+    width: int = 600
+    height: int = 800
+    game_line_y: float = 700
+    gravity: float = 0.2
+    bounce_damping: float = 0.8
+    bumper_move_speed: float = 5
+    holes: list = field(default_factory=list)  # (x, width) per hole in the game line
+    bumpers: list = field(default_factory=list)  # (x, y, width, height) per bumper
+    balls: np.ndarray = field(default_factory=lambda: np.zeros(0, BALL_DTYPE))  # BALL_DTYPE records
+
+    def to_dict(self):
+        balls = [{"x": float(b["x"]), "y": float(b["y"]), "vx": float(b["vx"]), "vy": float(b["vy"]),
+                  "radius": float(b["radius"]), "num_points": int(b["num_points"]),
+                  "color": [int(c) for c in b["color"]]} for b in self.balls]
+        return {
+            "width": self.width,
+            "height": self.height,
+            "game_line_y": self.game_line_y,
+            "physics": {"gravity": self.gravity, "bounce_damping": self.bounce_damping,
+                        "bumper_move_speed": self.bumper_move_speed},
+            "holes": [{"x": x, "width": width} for x, width in self.holes],
+            "bumpers": [{"x": x, "y": y, "width": width, "height": height}
+                        for x, y, width, height in self.bumpers],
+            "balls": balls,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        physics = data.get("physics", {})
+        specs = data.get("balls", [])
+        balls = np.zeros(len(specs), BALL_DTYPE)
+        for record, spec in zip(balls, specs):
+            record["x"] = spec["x"]
+            record["y"] = spec["y"]
+            record["vx"] = spec.get("vx", 0.0)
+            record["vy"] = spec.get("vy", 0.0)
+            record["radius"] = spec["radius"]
+            record["num_points"] = spec.get("num_points", 40)
+            record["color"] = spec.get("color", (255, 255, 255))
+        defaults = cls()
+        return cls(width=data.get("width", defaults.width),
+                   height=data.get("height", defaults.height),
+                   game_line_y=data.get("game_line_y", data.get("height", defaults.height) - 100),
+                   gravity=physics.get("gravity", defaults.gravity),
+                   bounce_damping=physics.get("bounce_damping", defaults.bounce_damping),
+                   bumper_move_speed=physics.get("bumper_move_speed", defaults.bumper_move_speed),
+                   holes=[(h["x"], h["width"]) for h in data.get("holes", [])],
+                   bumpers=[(b["x"], b["y"], b["width"], b["height"]) for b in data.get("bumpers", [])],
+                   balls=balls)
+
+
+def default_scene(width=600, height=800):
+    """The built-in level: eight balls, one centered bumper and a hole in each half of the line."""
+    game_line_y = height - 100  # Line 100 pixels from the bottom
+    hole_width = 60
+    bumper_width, bumper_height = 120, 25
+    balls = np.zeros(8, BALL_DTYPE)
+    specs = [
+        (width // 2, height // 2, 50, 25, (255, 100, 100), (3, 2)),  # Ball 1 (center)
+        (width // 4, height // 4, 40, 20, (100, 255, 100), (-2, 3)),  # Ball 2 (top left)
+        (3 * width // 4, 3 * height // 4, 45, 22, (100, 100, 255), (4, -1)),  # Ball 3 (bottom right)
+        (3 * width // 4, height // 4, 35, 18, (255, 255, 100), (-3, 1)),  # Ball 4 (top right)
+        (width // 4, 3 * height // 4, 42, 21, (255, 100, 255), (2, -2)),  # Ball 5 (bottom left)
+        (width // 2, height // 3, 38, 19, (100, 255, 255), (1, 4)),  # Ball 6 (center top)
+        (width // 2, 2 * height // 3, 47, 24, (255, 150, 100), (-1, -3)),  # Ball 7 (center bottom)
+        (width // 3, height // 2, 33, 17, (150, 100, 255), (3, -2)),  # Ball 8
+    ]
+    for record, (x, y, radius, num_points, color, (vx, vy)) in zip(balls, specs):
+        record["x"], record["y"], record["vx"], record["vy"] = x, y, vx, vy
+        record["radius"] = radius
+        record["num_points"] = num_points
+        record["color"] = color
+    return Scene(width, height, game_line_y,
+                 holes=[(width // 4 - hole_width // 2, hole_width), (3 * width // 4 - hole_width // 2, hole_width)],
+                 bumpers=[((width - bumper_width) // 2, game_line_y - bumper_height - 20,
+                           bumper_width, bumper_height)],
+                 balls=balls)
+
+
+def random_scene(num_balls, width=600, height=800, seed=None, num_points=12):
+    """The default level with num_balls random balls above the game line, for stress tests."""
+    scene = default_scene(width, height)
+    rng = np.random.default_rng(seed)
+    # One ball per cell of a grid over the play area, jittered inside its cell, so
+    # balls never start overlapping and shrink with the cells as the count grows
+    cols = max(1, math.ceil(math.sqrt(num_balls * width / scene.game_line_y)))
+    rows = max(1, math.ceil(num_balls / cols))
+    cell_w, cell_h = width / cols, scene.game_line_y / rows
+    radius = min(50.0, 0.4 * min(cell_w, cell_h))
+    cells = rng.permutation(cols * rows)[:num_balls]
+    balls = np.zeros(num_balls, BALL_DTYPE)
+    balls["radius"] = radius * rng.uniform(0.7, 1.0, num_balls)
+    slack_x = cell_w / 2 - balls["radius"]
+    slack_y = cell_h / 2 - balls["radius"]
+    balls["x"] = (cells % cols + 0.5) * cell_w + rng.uniform(-slack_x, slack_x)
+    balls["y"] = (cells // cols + 0.5) * cell_h + rng.uniform(-slack_y, slack_y)
+    balls["vx"] = rng.uniform(-4, 4, num_balls)
+    balls["vy"] = rng.uniform(-4, 4, num_balls)
+    balls["num_points"] = num_points
+    balls["color"] = rng.integers(100, 256, size=(num_balls, 3))
+    scene.balls = balls
+    return scene
+
+
+def _is_binary(path):
+    return str(path).endswith(BINARY_SUFFIXES)
+
+
+def save_scene(scene, path):
+    """Write a scene as JSON, or in the binary form for paths ending in .bbscene or .bin."""
+    if not _is_binary(path):
+        with open(path, "w") as f:
+            json.dump(scene.to_dict(), f, indent=2)
+        return
+    holes = np.array(scene.holes, dtype=np.float64).reshape(-1, 2)
+    bumpers = np.array(scene.bumpers, dtype=np.float64).reshape(-1, 4)
+    balls = np.ascontiguousarray(scene.balls, dtype=BALL_DTYPE)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, scene.width, scene.height, scene.game_line_y, scene.gravity,
+                             scene.bounce_damping, scene.bumper_move_speed, len(holes), len(bumpers), len(balls)))
+        f.write(holes.astype("<f8").tobytes())
+        f.write(bumpers.astype("<f8").tobytes())
+        f.write(balls.tobytes())
+
+
+def load_scene(path):
+    """Read a scene saved by save_scene(). Binary scenes keep their balls memory-mapped read-only."""
+    if not _is_binary(path):
+        with open(path) as f:
+            return Scene.from_dict(json.load(f))
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{path} is not a scene file")
+    (magic, version, width, height, game_line_y, gravity, damping, bumper_speed,
+     num_holes, num_bumpers, num_balls) = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a scene file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported scene file version {version}")
+    offset = _HEADER.size
+    holes = np.fromfile(path, dtype=_HOLE, count=num_holes, offset=offset)
+    offset += holes.nbytes
+    bumpers = np.fromfile(path, dtype=_BUMPER, count=num_bumpers, offset=offset)
+    offset += bumpers.nbytes
+    if num_balls:
+        balls = np.memmap(path, dtype=BALL_DTYPE, mode="r", offset=offset, shape=(num_balls,))
+    else:
+        balls = np.zeros(0, BALL_DTYPE)
+    return Scene(width, height, game_line_y, gravity, damping, bumper_speed,
+                 holes=[tuple(h) for h in holes.tolist()],
+                 bumpers=[tuple(b) for b in bumpers.tolist()],
+                 balls=balls)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a scene file")
+    parser.add_argument("output", help="Scene file to write (.json, or .bbscene for the binary form)")
+    parser.add_argument("--balls", type=int, default=None,
+                        help="Fill the level with this many random balls instead of the built-in ones")
+    parser.add_argument("--points", type=int, default=12, help="Dots per random ball")
+    parser.add_argument("--width", type=int, default=600)
+    parser.add_argument("--height", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.balls is None:
+        scene = default_scene(args.width, args.height)
+    else:
+        scene = random_scene(args.balls, args.width, args.height, args.seed, args.points)
+    save_scene(scene, args.output)
+    print(f"Wrote {len(scene.balls)} balls to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
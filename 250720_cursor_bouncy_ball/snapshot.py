@@ -0,0 +1,71 @@
+"""Copies of the game state that drawing reads, so a frame can be drawn while the next is simulated."""
+
+import copy
+
+import numpy as np
+
+
+class FrameSnapshot:
+    """Everything BouncyBallApp.draw_frame reads from the game, copied at one instant.
+
+    pos, prev_pos, vel, angle and radius hold one row per entry of balls, in
+    the same order. Their storage is kept between captures and only grows,
+    so a capture allocates little beyond the ball list and the bumper copies.
+    Ball objects are shared with the game; drawing only reads the parts of
+    them that never change (dot count, color) or that only drawing writes
+    (the level-of-detail count).
+    """
+
+    def __init__(self):
+        self.balls = []
+        self.bumpers = []  # Copies, drawn with Bumper.draw
+        self._slots = np.zeros(0, dtype=np.intp)
+        self._pos = np.zeros((0, 2))
+        self._prev_pos = np.zeros((0, 2))
+        self._vel = np.zeros((0, 2))
+        self._angle = np.zeros((0, 2))
+        self._radius = np.zeros(0)
+        self.slots = self.pos = self.prev_pos = self.vel = self.angle = self.radius = None
+        self.alpha = None  # How far through the last physics step to draw the balls; None for the end of it
+        self.frame = 0
+        self.time_ms = 0
+        self.score = 0
+        self.game_over = False
+        self.game_over_start_time = 0
+        self.asking_restart = False
+
+    def _reserve(self, n):
+        if n <= len(self._slots):
+            return
+        capacity = max(n, 2 * len(self._slots))
+        self._slots = np.zeros(capacity, dtype=np.intp)
+        self._pos = np.zeros((capacity, 2))
+        self._prev_pos = np.zeros((capacity, 2))
+        self._vel = np.zeros((capacity, 2))
+        self._angle = np.zeros((capacity, 2))
+        self._radius = np.zeros(capacity)
+
+    def capture(self, app, alpha=None):
+        """Copy app's drawable state into this snapshot and return it."""
+        balls = app.balls
+        n = len(balls)
+        self._reserve(n)
+        engine = app.physics
+        slots = self.slots = self._slots[:n]
+        slots[:] = balls.slots
+        # mode="clip" lets take() write straight into out instead of through a temporary
+        self.pos = np.take(engine.pos, slots, axis=0, out=self._pos[:n], mode="clip")
+        self.prev_pos = np.take(engine.prev_pos, slots, axis=0, out=self._prev_pos[:n], mode="clip")
+        self.vel = np.take(engine.vel, slots, axis=0, out=self._vel[:n], mode="clip")
+        self.angle = np.take(engine.angle, slots, axis=0, out=self._angle[:n], mode="clip")
+        self.radius = np.take(engine.radius, slots, out=self._radius[:n], mode="clip")
+        self.balls = list(balls)
+        self.bumpers = [copy.copy(bumper) for bumper in app.bumpers]
+        self.alpha = alpha
+        self.frame = app.frame
+        self.time_ms = app.time_ms
+        self.score = app.score
+        self.game_over = app.game_over
+        self.game_over_start_time = app.game_over_start_time
+        self.asking_restart = app.asking_restart
+        return self
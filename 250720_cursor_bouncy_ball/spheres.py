@@ -0,0 +1,51 @@
+"""Unit-sphere point sets shared by every ball with the same number of dots."""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+@lru_cache(maxsize=64)
+def unit_sphere(num_points):
+    """(num_points, 3) points evenly spread over the unit sphere on a golden-angle spiral.
+
+    The array is cached and shared, so it is returned read-only.
+    """
+    i = np.arange(num_points, dtype=np.float64)
+    theta = GOLDEN_ANGLE * i
+    z = 1 - (2 * i) / max(num_points - 1, 1)
+    radius = np.sqrt(1 - z * z)
+    points = np.column_stack((np.cos(theta) * radius, np.sin(theta) * radius, z))
+    points.setflags(write=False)
+    return points
+
+
+@lru_cache(maxsize=64)
+def nested_sphere(num_points):
+    """unit_sphere(num_points) reordered so that every prefix is itself spread over the whole sphere.
+
+    Points are taken in greedy farthest-point order: each one is the point
+    farthest from all the points before it. Drawing the first k points gives
+    a coarser ball made of a subset of the same dots, which is what the
+    level-of-detail system relies on.
+    """
+    points = unit_sphere(num_points)
+    order = np.empty(num_points, dtype=np.intp)
+    distance = np.full(num_points, np.inf)  # Squared distance to the nearest point taken so far
+    current = 0
+    for k in range(num_points):
+        order[k] = current
+        np.minimum(distance, ((points - points[current]) ** 2).sum(axis=1), out=distance)
+        current = int(np.argmax(distance))
+    nested = points[order]
+    nested.setflags(write=False)
+    return nested
+
+
+def precompute_spheres(counts):
+    """Build the point sets for every dot count in counts ahead of time, e.g. at startup."""
+    for num_points in counts:
+        nested_sphere(int(num_points))
@@ -0,0 +1,60 @@
+"""Pre-rendered dot sprites for depth-shaded vector balls."""
+
+import numpy as np
+import pygame
+
+
+def dot_shade(color, z):
+    """Color and radius of a dot at depth z in [-1, 1]; closer points are brighter and larger."""
+    z = np.asarray(z, dtype=np.float64)
+    brightness_factor = (z + 1) / 2  # z in [-1,1] -> [0,1]
+    colors = np.outer(brightness_factor, color).astype(np.int32)
+    np.minimum(colors, 255, out=colors)
+    sizes = (1 + 1.5 * (z + 1)).astype(np.int32)  # Smaller dots
+    return colors, sizes
+
+
+def depth_bucket(z, buckets):
+    """Index of the equal-width depth range each z in [-1, 1] falls in."""
+    index = ((np.asarray(z) + 1) * (buckets / 2)).astype(np.intp)
+    return np.clip(index, 0, buckets - 1)
+
+
+class DotAtlas:
+    """One pre-rasterized dot sprite per depth bucket for a single ball color.
+
+    Depths in [-1, 1] are split into `buckets` equal ranges and each range is
+    drawn once with the shading of its midpoint. Sprites are colorkeyed so a
+    frame's dots can be drawn with a single Surface.blits call.
+    """
+
+    def __init__(self, color, buckets):
+        self.color = tuple(color)
+        self.buckets = buckets
+        centers = -1 + (np.arange(buckets) + 0.5) * 2 / buckets
+        colors, sizes = dot_shade(self.color, centers)
+        convert = pygame.display.get_surface() is not None
+        self.sprites = []
+        for dot_color, size in zip(colors.tolist(), sizes.tolist()):
+            dot_color = tuple(dot_color)
+            # Any color other than the dot's own works as the transparent key
+            key = (0, 0, 0) if dot_color != (0, 0, 0) else (255, 255, 255)
+            sprite = pygame.Surface((2 * size + 1, 2 * size + 1))
+            sprite.fill(key)
+            pygame.draw.circle(sprite, dot_color, (size, size), size)
+            if convert:
+                sprite = sprite.convert()
+            sprite.set_colorkey(key, pygame.RLEACCEL)
+            self.sprites.append(sprite)
+        self.offsets = sizes  # Sprite center relative to its top-left corner
+
+_atlases = {}
+
+
+def get_atlas(color, buckets):
+    """Shared DotAtlas for a ball color and bucket count, built on first use."""
+    key = (tuple(color), buckets)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = DotAtlas(color, buckets)
+    return atlas
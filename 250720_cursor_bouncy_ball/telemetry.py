@@ -0,0 +1,138 @@
+"""Live telemetry streamed from a running game as newline-delimited JSON.
+
+Clients connect over TCP ("host:port") or a Unix socket (a filesystem
+path) and receive one JSON object per line: a "frame" message after every
+frame with the score, ball count and per-stage timings, game events such
+as "ball_drained" and "bumper_hit", and a "hit_stats" message with the
+collision counts and hot spots of every simulated second. Publishing never blocks the game:
+each client has a bounded queue that drops its oldest messages when the
+client reads too slowly.
+
+    python bouncy_ball.py --telemetry 127.0.0.1:7777
+    nc 127.0.0.1 7777
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+
+
+class _Client:
+    __slots__ = ("writer", "task", "queue", "ready", "dropped")
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.queue = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, line):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(line)
+        self.ready.set()
+
+
+class TelemetryServer:
+    """Fans messages out to every connected client from the game's asyncio loop."""
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size  # Messages buffered per client before the oldest are dropped
+        self.clients = set()
+        self.dropped = 0  # Messages dropped for clients that have since disconnected
+        self.server = None
+        self.unix_path = None
+
+    async def start(self, address):
+        """Listen on "host:port" for TCP, or on a Unix socket at any other address."""
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            self.server = await asyncio.start_server(self._serve, host or None, int(port))
+        else:
+            if os.path.exists(address):
+                os.unlink(address)  # Stale socket from an earlier run
+            self.server = await asyncio.start_unix_server(self._serve, path=address)
+            self.unix_path = address
+
+    async def close(self):
+        # Drop whatever is still unsent, even for clients stuck on a full socket
+        clients = list(self.clients)
+        for client in clients:
+            client.writer.transport.abort()
+            client.ready.set()
+        await asyncio.gather(*(client.task for client in clients), return_exceptions=True)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+    def publish(self, message):
+        """Queue a JSON-serializable message for every client. Never waits."""
+        if not self.clients:
+            return
+        line = (json.dumps(message, separators=(",", ":")) + "\n").encode()
+        for client in self.clients:
+            client.put(line)
+
+    def publish_frame(self, app):
+        """Publish the game events since the last frame, then a summary of the frame."""
+        events = app.events
+        while events:
+            self.publish(events.popleft())
+        frame_ms, stages = app.profiler.last_frame()
+        self.publish({
+            "type": "frame",
+            "frame": app.frame,
+            "time_ms": app.time_ms,
+            "score": app.score,
+            "balls": len(app.balls),
+            "game_over": app.game_over,
+            "frame_ms": frame_ms,
+            "stages": stages,
+        })
+
+    def publish_stats(self, summary):
+        """Publish one second of hit statistics; subscribed to the game's events.HitStats."""
+        self.publish({"type": "hit_stats", **summary})
+
+    async def _serve(self, reader, writer):
+        client = _Client(writer, self.queue_size)
+        self.clients.add(client)
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                if client.writer.is_closing():
+                    break
+                while client.queue:
+                    writer.write(client.queue.popleft())
+                # Messages published while this waits queue up (and drop) in client.queue
+                await writer.drain()
+        except ConnectionError:
+            pass  # Client went away, or close() shut its transport
+        finally:
+            self.clients.discard(client)
+            self.dropped += client.dropped
+            writer.close()
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "dropped": self.dropped + sum(client.dropped for client in self.clients),
+        }
+
+
+async def serve(app, address, queue_size=256):
+    """Run app.run_async() while streaming its telemetry on address."""
+    telemetry = TelemetryServer(queue_size)
+    await telemetry.start(address)
+    app.collisions.stats.subscribe(telemetry.publish_stats)
+    try:
+        await app.run_async(telemetry)
+    finally:
+        app.collisions.stats.unsubscribe(telemetry.publish_stats)
+        await telemetry.close()
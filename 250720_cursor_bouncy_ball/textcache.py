@@ -0,0 +1,75 @@
+"""Cached font loading and text rendering for the HUD."""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """Loads each font once and memoizes rendered text surfaces.
+
+    render() keeps an LRU of surfaces keyed on (font, text, color), which
+    suits strings that repeat (labels, the score). render_slot() is for
+    strings that change often, such as live coordinates: each named slot
+    keeps only its last surface and re-renders only when its text changes,
+    so they don't flush the LRU.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._fonts = {}  # (name, size) -> Font
+        self._surfaces = OrderedDict()  # (name, size, text, color, antialias) -> Surface
+        self._slots = {}  # slot -> (key, Surface)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size, name=None):
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()  # The game only initializes the subsystems it needs, when it needs them
+            font = self._fonts[key] = pygame.font.Font(name, size)
+        return font
+
+    def render(self, text, size, color, name=None, antialias=True):
+        key = (name, size, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font(size, name).render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def render_slot(self, slot, text, size, color, name=None, antialias=True):
+        key = (name, size, text, tuple(color), antialias)
+        cached = self._slots.get(slot)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        surface = self.font(size, name).render(text, antialias, color)
+        self._slots[slot] = (key, surface)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self._slots.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._surfaces),
+            "fonts": len(self._fonts),
+        }